@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Streaming reader/writer for bmc_complete_archive.json.
+
+The archive is one JSON object whose 'daily_calendar' maps year -> {date: day}.
+ArchiveWriter emits it one year at a time and ArchiveReader yields it back one
+year at a time, so peak memory is bounded by a single year of the calendar.
+
+With dedup, each year is stored as {'_tables': ..., '_days': ..., '_ranges': ...}:
+repeated 'people' blocks and world event objects are kept once in the year's
+tables and day entries refer to them by index; runs of consecutive days whose
+entries differ only in 'day_of_week' become [first, last, entry] ranges.
+Readers rehydrate this transparently.
+
+ShardWriter writes the same calendar as one file per year or month plus a
+manifest.json (see index.html loadArchive). ArchiveRewriter keeps an
+existing sharded copy in step with the archive it rewrites.
+"""
+
+import codecs
+import copy
+import hashlib
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+CALENDAR_KEY = 'daily_calendar'
+SHARD_DIR_NAME = 'bmc_archive_shards'
+MANIFEST_NAME = 'manifest.json'
+READ_CHUNK = 1 << 20
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def encode_days(days):
+    """Deduplicate a {date_key: day_entry} mapping into tables plus references"""
+    tables = {'people': [], 'world_events': []}
+    seen = {'people': {}, 'world_events': {}}
+
+    def ref(table, obj):
+        key = json.dumps(obj, sort_keys=True, ensure_ascii=False)
+        if key not in seen[table]:
+            seen[table][key] = len(tables[table])
+            tables[table].append(obj)
+        return seen[table][key]
+
+    encoded = {}
+    for date_key, entry in days.items():
+        entry = dict(entry)
+        if isinstance(entry.get('people'), dict):
+            entry['people'] = ref('people', entry['people'])
+        if isinstance(entry.get('world_events'), list):
+            entry['world_events'] = [ref('world_events', e) for e in entry['world_events']]
+        encoded[date_key] = entry
+
+    single_days, ranges = collapse_runs(encoded)
+    result = {'_tables': tables, '_days': single_days}
+    if ranges:
+        result['_ranges'] = ranges
+    return result
+
+
+def _range_template(date_key, entry):
+    """Entry minus its weekday if it can be rebuilt from the date, else None"""
+    if next(iter(entry), None) != 'day_of_week':
+        return None
+    try:
+        day = date.fromisoformat(date_key)
+    except ValueError:
+        return None
+    if entry['day_of_week'] != DAY_NAMES[day.weekday()]:
+        return None
+    return day, {k: v for k, v in entry.items() if k != 'day_of_week'}
+
+
+def collapse_runs(days):
+    """Split days into single entries and [first, last, template] ranges.
+
+    A range covers consecutive dates whose entries are equal apart from a
+    correct leading 'day_of_week'. Only calendars in date order are collapsed.
+    """
+    keys = list(days)
+    if keys != sorted(keys):
+        return days, []
+
+    single_days, ranges = {}, []
+    run = []  # [(date_key, day, template)]
+
+    def flush():
+        if len(run) > 1:
+            ranges.append([run[0][0], run[-1][0], run[0][2]])
+        else:
+            for date_key, _, _ in run:
+                single_days[date_key] = days[date_key]
+        run.clear()
+
+    for date_key in keys:
+        parsed = _range_template(date_key, days[date_key])
+        if parsed is None:
+            flush()
+            single_days[date_key] = days[date_key]
+            continue
+        day, template = parsed
+        if run and (day - run[-1][1]).days == 1 and template == run[-1][2]:
+            run.append((date_key, day, template))
+        else:
+            flush()
+            run.append((date_key, day, template))
+    flush()
+
+    return single_days, ranges
+
+
+def is_encoded(data):
+    return isinstance(data, dict) and '_tables' in data and '_days' in data
+
+
+def decode_days(data):
+    """Rehydrate an encode_days() mapping; plain mappings pass through unchanged"""
+    if not is_encoded(data):
+        return data
+
+    people = data['_tables'].get('people', [])
+    world_events = data['_tables'].get('world_events', [])
+
+    def rehydrate(entry):
+        entry = dict(entry)
+        if isinstance(entry.get('people'), int):
+            entry['people'] = copy.deepcopy(people[entry['people']])
+        if isinstance(entry.get('world_events'), list):
+            entry['world_events'] = [copy.deepcopy(world_events[i]) for i in entry['world_events']]
+        return entry
+
+    days = {date_key: rehydrate(entry) for date_key, entry in data['_days'].items()}
+
+    ranges = data.get('_ranges', [])
+    for first, last, template in ranges:
+        day, end = date.fromisoformat(first), date.fromisoformat(last)
+        while day <= end:
+            days[day.isoformat()] = rehydrate({'day_of_week': DAY_NAMES[day.weekday()], **template})
+            day += timedelta(days=1)
+
+    if ranges:
+        days = {date_key: days[date_key] for date_key in sorted(days)}
+
+    return days
+
+
+def shard_key(date_key, granularity):
+    """Shard a YYYY-MM-DD key belongs to: 'YYYY' or 'YYYY-MM'"""
+    return date_key[:4] if granularity == 'year' else date_key[:7]
+
+
+def read_shard_manifest(shard_dir):
+    """The manifest of a sharded calendar, or None if there is none"""
+    path = Path(shard_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def remove_shards(shard_dir):
+    """Delete a sharded calendar, manifest first so readers fall back to the archive"""
+    shard_dir = Path(shard_dir)
+    manifest_path = shard_dir / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest_path.unlink()
+    if shard_dir.exists():
+        shutil.rmtree(shard_dir)
+
+
+class ShardWriter:
+    """Write the calendar as one JSON file per year or month plus manifest.json.
+
+    Each shard is a {date_key: day_entry} mapping (in encode_days() form with
+    dedup); the manifest lists shard paths (relative to shard_dir), byte
+    sizes, day counts and SHA-256 hashes. Existing shards are removed when
+    the writer is created and the manifest is only written by close(), so a
+    reader never sees a manifest for a partial or stale set of shards.
+    """
+
+    def __init__(self, shard_dir, granularity='month', dedup=False):
+        self.shard_dir = Path(shard_dir)
+        self.granularity = granularity
+        self.dedup = dedup
+        self.entries = {}
+        remove_shards(self.shard_dir)
+
+    def write_year(self, days):
+        """Write one year of the calendar; returns its manifest entries"""
+        shards = defaultdict(dict)
+        for date_key, day_entry in days.items():
+            shards[shard_key(date_key, self.granularity)][date_key] = day_entry
+
+        entries = {}
+        for key in sorted(shards):
+            rel_path = f"{key[:4]}/{key}.json"
+            content = encode_days(shards[key]) if self.dedup else shards[key]
+            payload = json.dumps(content, ensure_ascii=False).encode('utf-8')
+            (self.shard_dir / key[:4]).mkdir(parents=True, exist_ok=True)
+            with open(self.shard_dir / rel_path, 'wb') as f:
+                f.write(payload)
+            entries[key] = {
+                'path': rel_path,
+                'bytes': len(payload),
+                'days': len(shards[key]),
+                'sha256': hashlib.sha256(payload).hexdigest()
+            }
+
+        self.entries.update(entries)
+        return entries
+
+    def close(self, metadata):
+        """Write manifest.json listing every shard written"""
+        manifest = {
+            'metadata': metadata,
+            'granularity': self.granularity,
+            'shards': {key: self.entries[key] for key in sorted(self.entries)}
+        }
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.shard_dir / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+
+class ArchiveWriter:
+    """Write the archive incrementally: header keys, calendar years, trailer keys.
+
+    Without dedup, output is byte-identical to json.dump(archive, f,
+    ensure_ascii=False) for the same key order. Data goes to a temporary file
+    that replaces `path` on close, so the archive can be read and rewritten
+    in the same pass.
+    """
+
+    def __init__(self, path, dedup=False, **header):
+        self.path = str(path)
+        self.dedup = dedup
+        self.tmp_path = self.path + '.tmp'
+        self.f = open(self.tmp_path, 'w', encoding='utf-8')
+        self.years_written = 0
+        self.f.write('{')
+        for key, value in header.items():
+            self._write_member(key, value)
+            self.f.write(', ')
+        self.f.write(json.dumps(CALENDAR_KEY) + ': {')
+
+    def _write_member(self, key, value):
+        self.f.write(json.dumps(key, ensure_ascii=False) + ': ')
+        self.f.write(json.dumps(value, ensure_ascii=False))
+
+    def write_year(self, year_str, days):
+        """Append one year of the daily calendar"""
+        if self.years_written:
+            self.f.write(', ')
+        self._write_member(year_str, encode_days(days) if self.dedup else days)
+        self.years_written += 1
+
+    def close(self, **trailer):
+        """Finish the calendar, write trailing top-level keys and publish the file"""
+        self.f.write('}')
+        for key, value in trailer.items():
+            self.f.write(', ')
+            self._write_member(key, value)
+        self.f.write('}')
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Discard the partial output"""
+        self.f.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        elif not self.f.closed:
+            self.close()
+
+
+class JsonStreamReader:
+    """Incremental JSON decoding over a text or binary file object.
+
+    Reads the input in chunks and decodes one value at a time with
+    raw_decode, so containers can be walked member by member without
+    loading the whole document. The buffer holds at most one chunk plus the
+    value being decoded.
+    """
+
+    def __init__(self, f, chunk_size=READ_CHUNK):
+        self.f = f
+        self.buf, self.pos, self.chunk_size = '', 0, chunk_size
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def _read(self):
+        """Next chunk of text; '' at end of input"""
+        while True:
+            chunk = self.f.read(self.chunk_size)
+            if isinstance(chunk, str):
+                return chunk
+            text = self.text_decoder.decode(chunk, final=not chunk)
+            # A chunk can end inside a multi-byte character and decode to nothing
+            if text or not chunk:
+                return text
+
+    def _fill(self):
+        chunk = self._read()
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_ws(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return
+
+    def expect(self, chars):
+        """Consume the next non-whitespace character, which must be one of chars"""
+        self._skip_ws()
+        if self.pos >= len(self.buf) or self.buf[self.pos] not in chars:
+            found = self.buf[self.pos:self.pos + 20] if self.pos < len(self.buf) else 'EOF'
+            name = getattr(self.f, 'name', 'input')
+            raise ValueError(f"{name}: expected one of {chars!r}, found {found!r}")
+        self.pos += 1
+        return self.buf[self.pos - 1]
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self._skip_ws()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Grow reads once a value outgrows them, so it is not re-scanned many times
+                if len(self.buf) - self.pos >= self.chunk_size:
+                    self.chunk_size *= 2
+                if not self._fill():
+                    raise
+                continue
+            # A number may be cut at the buffer boundary; be sure it is complete
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Iterate over the keys of the object whose '{' was just consumed.
+
+        The caller must consume each member's value (value(), or a nested
+        walk) before asking for the next key.
+        """
+        self._skip_ws()
+        if self.buf[self.pos:self.pos + 1] == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """Iterate over the elements of the array whose '[' was just consumed"""
+        self._skip_ws()
+        if self.buf[self.pos:self.pos + 1] == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+class ArchiveReader:
+    """Read the archive one calendar year at a time.
+
+    Top-level keys other than 'daily_calendar' are collected in `self.top`:
+    keys that precede the calendar are available as soon as years() starts
+    yielding, keys that follow it once years() is exhausted. Deduplicated
+    years are decoded; `self.dedup` records whether any were seen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.top = {}
+        self.dedup = False
+
+    def years(self):
+        """Yield (year_str, {date_key: day_entry}) in file order"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            stream = JsonStreamReader(f)
+            stream.expect('{')
+            for key in stream.members():
+                if key == CALENDAR_KEY:
+                    stream.expect('{')
+                    for year_str in stream.members():
+                        data = stream.value()
+                        if is_encoded(data):
+                            self.dedup = True
+                        yield year_str, decode_days(data)
+                else:
+                    self.top[key] = stream.value()
+
+
+class ArchiveRewriter:
+    """Rewrite an archive year by year.
+
+    Iterate years() and mutate each year's days in place; the year is written
+    out when the loop moves on. Years missing from the input can be appended
+    with add_year(), and `metadata` updated before close(). Each year is
+    written in date order, whatever order days were added in. Metadata is
+    written after the calendar, since it usually records what the rewrite
+    did. The output keeps the input's dedup encoding.
+
+    If a sharded copy of the calendar sits next to the output (SHARD_DIR_NAME),
+    it is rewritten alongside it with the same granularity, so the site's
+    shards never lag behind the archive.
+    """
+
+    def __init__(self, path, output_path=None):
+        self.reader = ArchiveReader(path)
+        self.output_path = output_path or path
+        self.writer = None
+        self.shards = None
+        self.header_keys = []
+
+    def _open_writer(self):
+        if self.writer is None:
+            header = {k: v for k, v in self.reader.top.items() if k != 'metadata'}
+            self.header_keys = list(header)
+            self.writer = ArchiveWriter(self.output_path, dedup=self.reader.dedup, **header)
+            shard_dir = Path(self.output_path).parent / SHARD_DIR_NAME
+            manifest = read_shard_manifest(shard_dir)
+            if manifest:
+                self.shards = ShardWriter(shard_dir, manifest['granularity'], self.reader.dedup)
+
+    def _write_year(self, year_str, days):
+        # Callers append new days at the end; put them back in date order so
+        # collapse_runs() can still emit ranges for the year
+        if list(days) != sorted(days):
+            days = {date_key: days[date_key] for date_key in sorted(days)}
+        self.writer.write_year(year_str, days)
+        if self.shards:
+            self.shards.write_year(days)
+
+    @property
+    def metadata(self):
+        return self.reader.top.setdefault('metadata', {})
+
+    def years(self):
+        """Yield (year_str, days) from the input; changes to days are kept"""
+        for year_str, days in self.reader.years():
+            self._open_writer()
+            yield year_str, days
+            self._write_year(year_str, days)
+
+    def add_year(self, year_str, days):
+        """Append a year that is not in the input archive"""
+        self._open_writer()
+        self._write_year(year_str, days)
+
+    def close(self):
+        """Write metadata and remaining top-level keys, then publish the file"""
+        self._open_writer()
+        trailer = {k: v for k, v in self.reader.top.items() if k not in self.header_keys}
+        self.writer.close(**trailer)
+        if self.shards:
+            self.shards.close(self.metadata)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy per-keyword categorization vs the keyword automaton in
+categorize_nyt, on the NYT headline corpus.
+
+Uses nyt_headlines_1933-1957.json when present, otherwise the titles of the
+categorized nyt_*.json files.
+"""
+
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from categorize_nyt import (CULTURE_KEYWORDS, EXCLUDE_PATTERNS, INTERNATIONAL_KEYWORDS,
+                            NATIONAL_KEYWORDS, categorize_headline)
+
+BASE_DIR = Path("/Users/sylvain/Documents/BMC-RADIO-SITE")
+REPEAT = 3
+
+
+def legacy_categorize_headline(headline_data):
+    """categorize_nyt.categorize_headline() as it was before the automaton"""
+    headline = headline_data['headline'].lower()
+    keywords = [k.lower() for k in headline_data.get('keywords', [])]
+    all_text = headline + ' ' + ' '.join(keywords)
+
+    for pattern in EXCLUDE_PATTERNS:
+        if re.search(pattern, all_text, re.IGNORECASE):
+            return None
+
+    scores = {'culture': 0, 'national': 0, 'international': 0}
+    for kw in CULTURE_KEYWORDS:
+        if kw in all_text:
+            scores['culture'] += 1
+    for kw in INTERNATIONAL_KEYWORDS:
+        if kw in all_text:
+            scores['international'] += 1
+    for kw in NATIONAL_KEYWORDS:
+        if kw in all_text:
+            scores['national'] += 1
+
+    if max(scores.values()) == 0:
+        return None
+    if scores['international'] > 0 and scores['international'] >= scores['national']:
+        return 'international'
+    elif scores['culture'] > scores['national'] and scores['culture'] > scores['international']:
+        return 'culture'
+    elif scores['national'] > 0:
+        return 'national'
+    elif scores['international'] > 0:
+        return 'international'
+    elif scores['culture'] > 0:
+        return 'culture'
+    return None
+
+
+def load_headlines(base_dir):
+    path = base_dir / "nyt_headlines_1933-1957.json"
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    headlines = []
+    for name in ['nyt_culture.json', 'nyt_national.json', 'nyt_international.json']:
+        path = base_dir / name
+        if path.exists():
+            with open(path, 'r') as f:
+                headlines.extend({'headline': h['title'], 'keywords': []} for h in json.load(f))
+    return headlines
+
+
+def best_of(fn, headlines):
+    """Fastest of REPEAT passes; returns (seconds, categories)"""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        categories = [fn(h) for h in headlines]
+        times.append(time.perf_counter() - start)
+    return min(times), categories
+
+
+def report(label, seconds, count):
+    print(f"  {label:<28} {seconds * 1000:9.1f} ms  {count / seconds:10,.0f} headlines/s")
+
+
+def main():
+    base_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else BASE_DIR
+    headlines = load_headlines(base_dir)
+    if not headlines:
+        print(f"No headlines found in {base_dir}")
+        return
+
+    print(f"Corpus: {len(headlines):,} headlines, {REPEAT} passes")
+
+    # Compile the automata outside the timed passes
+    categorize_headline(headlines[0])
+    categorize_headline(headlines[0], True)
+
+    legacy_time, legacy = best_of(legacy_categorize_headline, headlines)
+    automaton_time, automaton = best_of(categorize_headline, headlines)
+    boundary_time, boundary = best_of(lambda h: categorize_headline(h, True), headlines)
+
+    report("legacy substring scans", legacy_time, len(headlines))
+    report("automaton", automaton_time, len(headlines))
+    report("automaton, word boundaries", boundary_time, len(headlines))
+    print(f"Speedup: {legacy_time / automaton_time:.1f}x")
+
+    agree = sum(a == b for a, b in zip(legacy, automaton))
+    print(f"Automaton agrees with legacy on {agree:,}/{len(headlines):,} headlines")
+    changed = sum(a != b for a, b in zip(legacy, boundary))
+    print(f"Word boundaries change the category of {changed:,} headlines")
+
+
+if __name__ == "__main__":
+    main()
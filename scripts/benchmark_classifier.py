@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: naive Bayes headline classifier vs the keyword rules.
+
+Labels nyt_headlines_1933-1957.json with the keyword rules, trains
+headline_classifier on those categories with every HOLDOUT-th headline held
+out, prints the confusion matrix of the keyword rules' categories against
+the classifier's on the held-out headlines, then
+times vectorizing and classifying a synthetic corpus (default 2,000,000
+headlines) drawn from the real word frequencies and title lengths.
+
+    python benchmark_classifier.py [base_dir] [synthetic_count]
+"""
+
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from categorize_nyt import categorize_headline
+from headline_classifier import (BATCH_SIZE, CATEGORIES, TOKEN_RE, confusion_matrix, np, print_confusion, train,
+                                 vectorize)
+
+BASE_DIR = Path("/Users/sylvain/Documents/BMC-RADIO-SITE")
+HOLDOUT = 5
+SYNTHETIC_COUNT = 2_000_000
+SEED = 1933
+# Headlines run through the keyword rules for comparison
+RULES_SAMPLE = 100_000
+
+
+def rule_labels(base_dir):
+    """(titles, class indices) for the headlines the keyword rules categorize"""
+    with open(f'{base_dir}/nyt_headlines_1933-1957.json', 'r') as f:
+        headlines = json.load(f)
+    titles, labels = [], []
+    for headline in headlines:
+        category = categorize_headline(headline)
+        if category:
+            titles.append(headline['headline'][:200])
+            labels.append(CATEGORIES.index(category))
+    return titles, labels
+
+
+def synthetic_titles(titles, count, seed=SEED):
+    """count titles of real lengths made of words drawn by real frequency"""
+    rng = np.random.default_rng(seed)
+    tokenized = [TOKEN_RE.findall(title.lower()) for title in titles]
+    frequencies = Counter(word for words in tokenized for word in words)
+    words = list(frequencies)
+    weights = np.array([frequencies[word] for word in words], dtype=np.float64)
+    lengths = rng.choice([len(words) for words in tokenized if words], size=count)
+    stream = np.array(words, dtype=object)[rng.choice(len(words), size=int(lengths.sum()), p=weights / weights.sum())]
+    stream = stream.tolist()
+    corpus, start = [], 0
+    for n in lengths.tolist():
+        corpus.append(' '.join(stream[start:start + n]))
+        start += n
+    return corpus
+
+
+def report(label, seconds, count):
+    print(f"  {label:<28} {seconds * 1000:11.1f} ms  {count / seconds:12,.0f} headlines/s")
+
+
+def evaluate(titles, labels):
+    test = set(range(0, len(titles), HOLDOUT))
+    train_titles = [t for i, t in enumerate(titles) if i not in test]
+    train_labels = [c for i, c in enumerate(labels) if i not in test]
+    test_titles = [titles[i] for i in sorted(test)]
+    test_labels = [CATEGORIES[labels[i]] for i in sorted(test)]
+
+    start = time.perf_counter()
+    model = train(train_titles, train_labels)
+    print(f"Trained on {len(train_titles):,} headlines in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    predicted = [CATEGORIES[code] for code in model.predict(vectorize(test_titles))]
+    print(f"\nHeld-out headlines (every {HOLDOUT}th, {len(test_titles):,}):")
+    print_confusion(confusion_matrix(test_labels, predicted))
+    return model
+
+
+def throughput(model, titles, count):
+    start = time.perf_counter()
+    corpus = synthetic_titles(titles, count)
+    print(f"\nSynthetic corpus: {len(corpus):,} headlines ({time.perf_counter() - start:.1f}s to generate)")
+
+    vectorize_time = score_time = 0.0
+    counts = np.zeros(len(CATEGORIES), dtype=np.int64)
+    for start in range(0, len(corpus), BATCH_SIZE):
+        t0 = time.perf_counter()
+        X = vectorize(corpus[start:start + BATCH_SIZE])
+        t1 = time.perf_counter()
+        counts += np.bincount(model.predict(X), minlength=len(CATEGORIES))
+        t2 = time.perf_counter()
+        vectorize_time += t1 - t0
+        score_time += t2 - t1
+
+    sample = corpus[:RULES_SAMPLE]
+    start = time.perf_counter()
+    for title in sample:
+        categorize_headline({'headline': title, 'keywords': []})
+    rules_time = time.perf_counter() - start
+
+    report("vectorize (hashing)", vectorize_time, len(corpus))
+    report("classify (array ops)", score_time, len(corpus))
+    report("classifier total", vectorize_time + score_time, len(corpus))
+    report(f"keyword rules ({len(sample):,})", rules_time, len(sample))
+    print("  Predicted: " + ', '.join(f"{name} {n:,}" for name, n in zip(CATEGORIES, counts)))
+
+
+def main():
+    base_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else BASE_DIR
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else SYNTHETIC_COUNT
+    if np is None:
+        print("This benchmark needs NumPy")
+        return
+
+    titles, labels = rule_labels(base_dir)
+    print(f"Corpus: {len(titles):,} categorized headlines")
+    model = evaluate(titles, labels)
+    throughput(model, titles, count)
+
+
+if __name__ == "__main__":
+    main()
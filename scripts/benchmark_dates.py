@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: legacy per-call date parsing vs the shared bmc_dates engine,
+and string-keyed range/sort/bucket passes vs their epoch-day batch versions.
+
+The corpus combines the dated events in bmc_verified_faculty_courses.json,
+the raw dates extracted from Duberman and every NYT headline date.
+"""
+
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from bmc_dates import in_range, normalize, np, parse_batch, years_of
+
+BASE_DIR = Path("/Users/sylvain/Documents/BMC-RADIO-SITE")
+REPEAT = 5
+
+
+def legacy_parse_date(date_str, precision):
+    """generate_chronos.parse_date() as it was before bmc_dates"""
+    dates = []
+
+    if not date_str:
+        return dates
+
+    if precision in ['day', 'exact']:
+        match = re.match(r'^(\d{4})-(\d{2})-(\d{2})$', date_str)
+        if match:
+            dates.append((date_str, True))
+            return dates
+
+        match = re.match(r'^([A-Za-z]+)\s+(\d+),?\s+(\d{4})$', date_str)
+        if match:
+            month_name, day, year = match.groups()
+            months = {'January': '01', 'February': '02', 'March': '03', 'April': '04',
+                     'May': '05', 'June': '06', 'July': '07', 'August': '08',
+                     'September': '09', 'October': '10', 'November': '11', 'December': '12'}
+            if month_name in months:
+                dates.append((f"{year}-{months[month_name]}-{int(day):02d}", True))
+                return dates
+
+    if precision == 'month':
+        match = re.match(r'^([A-Za-z]+)\s+(\d{4})$', date_str)
+        if match:
+            month_name, year = match.groups()
+            months = {'January': '01', 'February': '02', 'March': '03', 'April': '04',
+                     'May': '05', 'June': '06', 'July': '07', 'August': '08',
+                     'September': '09', 'October': '10', 'November': '11', 'December': '12'}
+            if month_name in months:
+                dates.append((f"{year}-{months[month_name]}-01", False))
+                return dates
+
+    if precision == 'year':
+        match = re.match(r'^(\d{4})$', date_str)
+        if match:
+            dates.append((f"{match.group(1)}-01-01", False))
+            return dates
+
+    match = re.match(r'^(\d{4})-(\d{2,4})$', date_str)
+    if match:
+        dates.append((f"{match.group(1)}-09-01", False))
+        return dates
+
+    match = re.search(r'(\d{4})s', date_str)
+    if match:
+        dates.append((f"{match.group(1)}-01-01", False))
+        return dates
+
+    match = re.search(r'(\d{4})', date_str)
+    if match:
+        dates.append((f"{match.group(1)}-01-01", False))
+        return dates
+
+    return dates
+
+
+def load_corpus(base_dir):
+    """(raw, precision) pairs from the event sources that exist under base_dir"""
+    corpus = []
+
+    path = base_dir / "bmc_verified_faculty_courses.json"
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for year_data in data.get('academic_years', {}).values():
+            for event in year_data.get('events', []):
+                corpus.append((event.get('date', ''), event.get('date_precision', 'approximate')))
+
+    path = base_dir / "duberman_extracted.json"
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for event in data.get('events', []):
+            for d in event.get('dates', []):
+                corpus.append((d.get('raw', ''), d.get('type')))
+
+    for name in ['nyt_national.json', 'nyt_international.json', 'nyt_culture.json']:
+        path = base_dir / name
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                corpus.extend((article.get('date', ''), 'day') for article in json.load(f))
+
+    return corpus
+
+
+def time_pass(parse, corpus):
+    start = time.perf_counter()
+    for raw, precision in corpus:
+        parse(raw, precision)
+    return time.perf_counter() - start
+
+
+def best_of(fn, arg):
+    """Fastest of REPEAT timed calls fn(arg)"""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(label, seconds, count):
+    print(f"  {label:<28} {seconds * 1000:9.1f} ms  {count / seconds:12,.0f} dates/s")
+
+
+def string_pass(date_keys):
+    """Window, sort and count per year on YYYY-MM-DD strings"""
+    kept = sorted(k for k in date_keys if '1933-09-01' <= k <= '1957-12-31')
+    per_year = {}
+    for k in kept:
+        per_year[k[:4]] = per_year.get(k[:4], 0) + 1
+    return per_year
+
+
+def batch_pass(batch):
+    """The same window, sort and per-year count on day offsets"""
+    mask = in_range(batch, '1933-09-01', '1957-12-31')
+    kept = np.sort(batch.start[mask])
+    return np.bincount(years_of(kept) - 1933)
+
+
+def batch_report(corpus):
+    days = [raw for raw, precision in corpus if precision == 'day']
+    date_keys = [normalize(raw).start_day for raw in days if normalize(raw)]
+    batch = parse_batch(date_keys)
+
+    strings = best_of(string_pass, date_keys)
+    vector = best_of(batch_pass, batch)
+
+    print(f"Window + sort + per-year count over {len(date_keys):,} day dates:")
+    report("ISO strings", strings, len(date_keys))
+    report("epoch-day arrays", vector, len(date_keys))
+    print(f"Speedup: {strings / vector:.1f}x")
+
+
+def main():
+    base_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else BASE_DIR
+    corpus = load_corpus(base_dir)
+    if not corpus:
+        print(f"No date sources found in {base_dir}")
+        return
+
+    print(f"Corpus: {len(corpus):,} dates ({len(set(corpus)):,} distinct), {REPEAT} passes")
+
+    legacy = min(time_pass(legacy_parse_date, corpus) for _ in range(REPEAT))
+
+    cold = []
+    for _ in range(REPEAT):
+        normalize.cache_clear()
+        cold.append(time_pass(normalize, corpus))
+    cold = min(cold)
+
+    warm = min(time_pass(normalize, corpus) for _ in range(REPEAT))
+
+    report("legacy parse_date", legacy, len(corpus))
+    report("bmc_dates.normalize (cold)", cold, len(corpus))
+    report("bmc_dates.normalize (warm)", warm, len(corpus))
+    print(f"Speedup: {legacy / cold:.1f}x cold, {legacy / warm:.1f}x warm")
+
+    if np is not None:
+        print()
+        batch_report(corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Shared date normalization for the BMC pipeline scripts.
+
+normalize(raw, precision) turns the date strings found in the sources
+("October 16, 1933", "March 1935", "1946-47", "fall of 1945", "c. 1940",
+"1930s", ...) into a canonical DateRecord(start_day, end_day, precision)
+with ISO YYYY-MM-DD bounds. Patterns are compiled once at import, month and
+season tables are module constants, and results are memoized.
+
+parse_batch(raws, precision) does the same for a whole list at once and
+returns day offsets since 1933-01-01 as int32 arrays (plus precision codes
+and a validity mask), so range checks, sorting and bucketing can be done with
+NumPy instead of comparing strings. format_days() turns offsets back into
+ISO strings. Without NumPy the batch holds plain lists.
+"""
+
+import calendar
+import re
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DateRecord = namedtuple('DateRecord', ['start_day', 'end_day', 'precision'])
+DateBatch = namedtuple('DateBatch', ['start', 'end', 'precision', 'valid'])
+
+# Day offsets in batches count from here
+EPOCH = date(1933, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+# Precision codes stored in DateBatch.precision; -1 marks an unparsed date
+PRECISION_NAMES = ['day', 'month', 'season', 'year', 'circa', 'approximate', 'academic_year', 'decade']
+PRECISION_CODES = {name: code for code, name in enumerate(PRECISION_NAMES)}
+INVALID_PRECISION = -1
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+MONTH_NUMBERS = {name.lower(): i for i, name in enumerate(MONTH_NAMES, 1)}
+
+# Season -> (first month, number of months); winter runs into the next year
+SEASON_MONTHS = {
+    'spring': (3, 3),
+    'summer': (6, 3),
+    'fall': (9, 3),
+    'autumn': (9, 3),
+    'winter': (12, 3)
+}
+
+# Precision ranking, finest first; used to widen a record to a coarser hint
+PRECISION_RANK = {
+    'day': 0, 'exact': 0,
+    'month': 1,
+    'season': 2,
+    'year': 3, 'circa': 3, 'approximate': 3,
+    'academic_year': 4,
+    'decade': 5
+}
+
+MONTHS_RE = r'(?:' + '|'.join(MONTH_NAMES) + r')'
+SEASONS_RE = r'(?:fall|autumn|spring|summer|winter)'
+
+# Whole-string formats accepted by normalize()
+ISO_DAY_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+ISO_MONTH_RE = re.compile(r'^(\d{4})-(\d{2})$')
+MONTH_DAY_YEAR_RE = re.compile(rf'^({MONTHS_RE})\s+(\d{{1,2}})(?:\s*[-–]\s*(\d{{1,2}}))?,?\s+(\d{{4}})$', re.IGNORECASE)
+MONTH_YEAR_RE = re.compile(rf'^({MONTHS_RE}),?\s+(\d{{4}})$', re.IGNORECASE)
+YEAR_RE = re.compile(r'^(\d{4})$')
+ACADEMIC_YEAR_RE = re.compile(r'^(\d{4})\s*[-–/]\s*(\d{2}|\d{4})$')
+SEASON_NAME_RE = re.compile(SEASONS_RE, re.IGNORECASE)
+SEASON_YEAR_RE = re.compile(rf'^({SEASONS_RE})\s+(?:of\s+)?(\d{{4}})$', re.IGNORECASE)
+CIRCA_RE = re.compile(r'^(?:c\.?|ca\.?|circa)\s*(\d{4})$', re.IGNORECASE)
+SPAN_RE = re.compile(r'^(.+?)\s+(?:to|through|-|–)\s+(.+)$', re.IGNORECASE)
+DECADE_RE = re.compile(r'(\d{3})0s')
+ANY_YEAR_RE = re.compile(r'(\d{4})')
+
+# Patterns for scanning running text (1930s-1950s only)
+TEXT_FULL_DATE_RE = re.compile(rf'({MONTHS_RE})\s+(\d{{1,2}}),?\s+(19[3-5]\d)')
+TEXT_FULL_DATE_ANY_YEAR_RE = re.compile(rf'({MONTHS_RE})\s+(\d{{1,2}}),?\s+(\d{{4}})')
+TEXT_MONTH_YEAR_RE = re.compile(rf'({MONTHS_RE})\s+(19[3-5]\d)')
+TEXT_YEAR_RANGE_RE = re.compile(r'\b(19[3-5]\d)[-–](19[3-5]\d|\d{2})\b')
+TEXT_SEASON_RE = re.compile(rf'{SEASONS_RE}\s+(?:of\s+)?(19[3-5]\d)', re.IGNORECASE)
+TEXT_YEAR_RE = re.compile(r'\b(19[3-5]\d)\b')
+
+
+def month_number(month):
+    """Month as 1-12 from an int or a (case-insensitive) month name; None if unknown"""
+    if month is None:
+        return None
+    if isinstance(month, int):
+        return month if 1 <= month <= 12 else None
+    return MONTH_NUMBERS.get(str(month).strip().lower())
+
+
+def expand_short_year(start_year, end):
+    """'1946', '47' -> 1947; full years pass through"""
+    end = str(end)
+    if len(end) == 2:
+        return int(str(start_year)[:2] + end)
+    return int(end)
+
+
+def _iso(year, month, day):
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+@lru_cache(maxsize=None)
+def _last_day(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def day_record(year, month, day, end_day=None):
+    """Record for one day, or a day range within a month; None if invalid"""
+    end_day = end_day or day
+    if not 1 <= month <= 12 or not 1 <= day <= end_day <= _last_day(year, month):
+        return None
+    return DateRecord(_iso(year, month, day), _iso(year, month, end_day), 'day')
+
+
+def month_record(year, month):
+    if not 1 <= month <= 12:
+        return None
+    return DateRecord(_iso(year, month, 1), _iso(year, month, _last_day(year, month)), 'month')
+
+
+def season_record(year, season):
+    first, count = SEASON_MONTHS[season.lower()]
+    end_year, end_month = divmod(first - 1 + count - 1, 12)
+    end_year += year
+    end_month += 1
+    return DateRecord(_iso(year, first, 1), _iso(end_year, end_month, _last_day(end_year, end_month)), 'season')
+
+
+def year_record(year, precision='year'):
+    return DateRecord(_iso(year, 1, 1), _iso(year, 12, 31), precision)
+
+
+def academic_year_record(start_year, end_year=None):
+    """September 1 of start_year through August 31 of end_year"""
+    end_year = end_year or start_year + 1
+    return DateRecord(_iso(start_year, 9, 1), _iso(end_year, 8, 31), 'academic_year')
+
+
+def decade_record(decade_start):
+    return DateRecord(_iso(decade_start, 1, 1), _iso(decade_start + 9, 12, 31), 'decade')
+
+
+def widen(record, precision):
+    """Coarsen a record to the granularity of a precision hint"""
+    if record is None or PRECISION_RANK.get(precision, 0) <= PRECISION_RANK[record.precision]:
+        return record
+    year, month = int(record.start_day[:4]), int(record.start_day[5:7])
+    if precision == 'month':
+        return month_record(year, month)
+    if precision in ('year', 'circa', 'approximate'):
+        return year_record(year, 'year' if precision == 'approximate' else precision)
+    if precision == 'academic_year':
+        if PRECISION_RANK[record.precision] >= PRECISION_RANK['year']:
+            return academic_year_record(year)
+        return academic_year_record(year if month >= 9 else year - 1)
+    if precision == 'decade':
+        return decade_record(year - year % 10)
+    return record
+
+
+def _parse(raw):
+    """Match a stripped date string against the known whole-string formats"""
+    match = ISO_DAY_RE.match(raw)
+    if match:
+        year, month, day = map(int, match.groups())
+        if 1 <= month <= 12 and 1 <= day <= _last_day(year, month):
+            return DateRecord(raw, raw, 'day')
+        return None
+
+    match = MONTH_DAY_YEAR_RE.match(raw)
+    if match:
+        month_name, day, end_day, year = match.groups()
+        return day_record(int(year), month_number(month_name), int(day), int(end_day) if end_day else None)
+
+    match = MONTH_YEAR_RE.match(raw)
+    if match:
+        return month_record(int(match.group(2)), month_number(match.group(1)))
+
+    match = ISO_MONTH_RE.match(raw)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return month_record(int(match.group(1)), int(match.group(2)))
+
+    match = YEAR_RE.match(raw)
+    if match:
+        return year_record(int(match.group(1)))
+
+    match = ACADEMIC_YEAR_RE.match(raw)
+    if match:
+        start = int(match.group(1))
+        return academic_year_record(start, expand_short_year(start, match.group(2)))
+
+    match = SEASON_YEAR_RE.match(raw)
+    if match:
+        return season_record(int(match.group(2)), match.group(1))
+
+    match = CIRCA_RE.match(raw)
+    if match:
+        return year_record(int(match.group(1)), 'circa')
+
+    # Span of two dates: "September 9, 1939 to August 31, 1940"
+    match = SPAN_RE.match(raw)
+    if match:
+        first, last = _parse(match.group(1)), _parse(match.group(2))
+        if (first and last and first.precision in ('day', 'month')
+                and last.precision in ('day', 'month') and first.start_day <= last.end_day):
+            return DateRecord(first.start_day, last.end_day, first.precision)
+
+    # Approximate: "1930s", "early 1930s"
+    match = DECADE_RE.search(raw)
+    if match:
+        return decade_record(int(match.group(1)) * 10)
+
+    # Anything else that mentions a year
+    match = ANY_YEAR_RE.search(raw)
+    if match:
+        return year_record(int(match.group(1)), 'approximate')
+
+    return None
+
+
+@lru_cache(maxsize=None)
+def normalize(raw, precision=None):
+    """Canonical DateRecord(start_day, end_day, precision) for a date string.
+
+    precision is an optional hint from the source ('day', 'month', 'year',
+    ...); a parse finer than the hint is widened to it. Returns None when no
+    date can be recovered.
+    """
+    if not raw:
+        return None
+    return widen(_parse(str(raw).strip()), precision)
+
+
+@lru_cache(maxsize=None)
+def from_fields(kind, year=None, month=None, day=None, start_year=None, end_year=None, raw=None):
+    """DateRecord for the structured date dicts produced by the extractors.
+
+    kind is the extractor's 'type': exact, month, year, circa, season,
+    academic_year or range. Missing months and days default to 1.
+    """
+    if year is None and start_year is None:
+        return None
+    if kind == 'exact':
+        return day_record(year, month_number(month) or 1, day or 1)
+    if kind == 'month':
+        return month_record(year, month_number(month) or 1)
+    if kind == 'year':
+        return year_record(year)
+    if kind == 'circa':
+        return year_record(year, 'circa')
+    if kind == 'season':
+        match = SEASON_NAME_RE.search(raw or '')
+        return season_record(year, match.group(0)) if match else month_record(year, 1)
+    if kind in ('academic_year', 'range'):
+        return academic_year_record(start_year, end_year)
+    return None
+
+
+@lru_cache(maxsize=None)
+def day_number(iso_day):
+    """Days from 1933-01-01 to an ISO YYYY-MM-DD date (negative before it)"""
+    return date.fromisoformat(iso_day).toordinal() - EPOCH_ORDINAL
+
+
+def _iso_day_batch(raws, precisions):
+    """Vectorized fast path for lists of plain ISO days; None if it does not apply"""
+    if any(hint not in (None, 'day', 'exact') for hint in set(precisions)):
+        return None
+    try:
+        arr = np.asarray(raws, dtype=str)
+        if arr.ndim != 1 or not (np.char.str_len(arr) == 10).all():
+            return None
+        days = arr.astype('datetime64[D]')
+    except (TypeError, ValueError):
+        return None
+    # datetime64 accepts some strings ISO_DAY_RE would not ("+1933-1-1" style)
+    if not (days.astype(str) == arr).all():
+        return None
+    start = (days - np.datetime64(EPOCH, 'D')).astype(np.int32)
+    return DateBatch(start, start.copy(),
+                     np.full(len(start), PRECISION_CODES['day'], dtype=np.int8),
+                     np.ones(len(start), dtype=bool))
+
+
+def parse_batch(raws, precision=None):
+    """Normalize a list of date strings into a DateBatch of parallel arrays.
+
+    precision is one hint for every date or a list with one hint per date.
+    start/end are int32 day offsets since 1933-01-01, precision holds
+    PRECISION_CODES (int8) and valid is a boolean mask; unparsed dates have
+    valid False, offsets 0 and precision INVALID_PRECISION.
+    """
+    raws = list(raws)
+    if isinstance(precision, (list, tuple)):
+        precisions = list(precision)
+    else:
+        precisions = [precision] * len(raws)
+
+    if np is not None and raws:
+        batch = _iso_day_batch(raws, precisions)
+        if batch is not None:
+            return batch
+
+    start, end, codes, valid = [], [], [], []
+    for raw, hint in zip(raws, precisions):
+        record = normalize(raw, hint)
+        if record:
+            start.append(day_number(record.start_day))
+            end.append(day_number(record.end_day))
+            codes.append(PRECISION_CODES.get(record.precision, PRECISION_CODES['day']))
+            valid.append(True)
+        else:
+            start.append(0)
+            end.append(0)
+            codes.append(INVALID_PRECISION)
+            valid.append(False)
+
+    if np is None:
+        return DateBatch(start, end, codes, valid)
+    return DateBatch(np.asarray(start, dtype=np.int32), np.asarray(end, dtype=np.int32),
+                     np.asarray(codes, dtype=np.int8), np.asarray(valid, dtype=bool))
+
+
+def format_days(offsets):
+    """ISO YYYY-MM-DD strings for day offsets since 1933-01-01"""
+    if np is not None:
+        days = np.datetime64(EPOCH, 'D') + np.asarray(offsets, dtype=np.int64).astype('timedelta64[D]')
+        return days.astype(str).tolist()
+    return [date.fromordinal(EPOCH_ORDINAL + int(offset)).isoformat() for offset in offsets]
+
+
+def years_of(offsets):
+    """Calendar year of each day offset, for bucketing"""
+    if np is not None:
+        days = np.datetime64(EPOCH, 'D') + np.asarray(offsets, dtype=np.int64).astype('timedelta64[D]')
+        return days.astype('datetime64[Y]').astype(np.int32) + 1970
+    return [date.fromordinal(EPOCH_ORDINAL + int(offset)).year for offset in offsets]
+
+
+def in_range(batch, first_day, last_day):
+    """Mask of valid dates whose start falls within [first_day, last_day] (ISO strings)"""
+    lo, hi = day_number(first_day), day_number(last_day)
+    if np is not None and isinstance(batch.start, np.ndarray):
+        return batch.valid & (batch.start >= lo) & (batch.start <= hi)
+    return [ok and lo <= start <= hi for ok, start in zip(batch.valid, batch.start)]
@@ -1,10 +1,47 @@
 #!/usr/bin/env python3
 """
 Categorize NY Times headlines into Culture, National, and International.
+
+The keyword lists are compiled once into an Aho-Corasick automaton that
+scores all three categories in a single pass over each headline, and the
+exclusion patterns into one regex. --word-boundaries only counts keywords
+that are not part of a longer word ("art" no longer matches "party").
+
+Besides the three category files, headlines are written as per-month shards
+under nyt_shards/ ({date: {category: [headline, ...]}}) with an index.json
+of the days that have headlines, so the site can fetch a single month for
+a date lookup instead of all three files.
+
+Every headline carries a cluster ID from headline_clusters: near-duplicate
+headlines within a few days of each other (often split between the national
+and international files) share one, so the site can show each story once.
+
+Each headline's keyword and exclusion matches are kept in
+nyt_category_cache.json.gz. On the next run, edits to the keyword lists or
+EXCLUDE_PATTERNS are applied to the cached matches (only the added or
+removed keywords and patterns are evaluated) and only new headlines are
+matched in full; --no-cache starts over.
+
+--classifier keeps the rules' decision on whether a headline is categorized
+at all, but picks its category with a naive Bayes model (headline_classifier)
+instead of the keyword vote. The model learns the rules' categories from the
+same run, each headline being labelled by a model trained on the other folds,
+so reruns give the same output and the printed rule vs classifier matrix is
+held-out agreement.
 """
 
+import argparse
 import json
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from category_cache import CategoryCache, text_key
+from headline_classifier import FOLDS, confusion_matrix, cross_predict, np, print_confusion
+from headline_clusters import cluster_ids, cluster_sizes
+from keyword_automaton import KeywordAutomaton
 
 # Keywords for categorization
 CULTURE_KEYWORDS = [
@@ -75,31 +112,55 @@ EXCLUDE_PATTERNS = [
     r'\bwedding\b', r'\bengaged\b', r'\bmarried\b',
 ]
 
-def categorize_headline(headline_data):
-    """Categorize a single headline."""
-    headline = headline_data['headline'].lower()
-    keywords = [k.lower() for k in headline_data.get('keywords', [])]
-    all_text = headline + ' ' + ' '.join(keywords)
+CATEGORY_KEYWORDS = {
+    'culture': CULTURE_KEYWORDS,
+    'national': NATIONAL_KEYWORDS,
+    'international': INTERNATIONAL_KEYWORDS,
+}
+
+# All exclusions as one alternation, plus each on its own to tell which ones hit
+EXCLUDE_RE = re.compile('|'.join(f'(?:{p})' for p in EXCLUDE_PATTERNS), re.IGNORECASE)
+EXCLUDE_RES = [re.compile(p, re.IGNORECASE) for p in EXCLUDE_PATTERNS]
+
+# Categories each keyword scores for
+KEYWORD_LABELS = {}
+for label, keywords in CATEGORY_KEYWORDS.items():
+    for keyword in keywords:
+        KEYWORD_LABELS.setdefault(keyword, []).append(label)
 
-    # Check exclusions first
-    for pattern in EXCLUDE_PATTERNS:
-        if re.search(pattern, all_text, re.IGNORECASE):
-            return None
+_automata = {}
 
-    # Score each category
-    scores = {'culture': 0, 'national': 0, 'international': 0}
+def keyword_automaton(word_boundaries=False):
+    """The category keyword automaton, compiled on first use."""
+    if word_boundaries not in _automata:
+        _automata[word_boundaries] = KeywordAutomaton(CATEGORY_KEYWORDS, word_boundaries)
+    return _automata[word_boundaries]
+
+def headline_text(headline_data):
+    """The text a headline is matched on: lowercased headline plus keywords."""
+    headline = headline_data['headline'].lower()
+    keywords = [k.lower() for k in headline_data.get('keywords', [])]
+    return headline + ' ' + ' '.join(keywords)
 
-    for kw in CULTURE_KEYWORDS:
-        if kw in all_text:
-            scores['culture'] += 1
+def match_text(text, word_boundaries=False):
+    """(keywords found in text, exclusion patterns that match it)."""
+    automaton = keyword_automaton(word_boundaries)
+    keywords = [automaton.keywords[i] for i in automaton.matches(text)]
+    exclusions = []
+    if EXCLUDE_RE.search(text):
+        exclusions = [p for p, pattern_re in zip(EXCLUDE_PATTERNS, EXCLUDE_RES) if pattern_re.search(text)]
+    return keywords, exclusions
 
-    for kw in INTERNATIONAL_KEYWORDS:
-        if kw in all_text:
-            scores['international'] += 1
+def category_for(keywords, exclusions):
+    """Category for a headline's matched keywords and exclusions."""
+    if exclusions:
+        return None
 
-    for kw in NATIONAL_KEYWORDS:
-        if kw in all_text:
-            scores['national'] += 1
+    # Score each category: number of distinct keywords present
+    scores = dict.fromkeys(CATEGORY_KEYWORDS, 0)
+    for keyword in keywords:
+        for label in KEYWORD_LABELS.get(keyword, ()):
+            scores[label] += 1
 
     # Determine category based on highest score
     if max(scores.values()) == 0:
@@ -119,66 +180,281 @@ def categorize_headline(headline_data):
 
     return None
 
+def categorize_headline(headline_data, word_boundaries=False):
+    """Categorize a single headline."""
+    return category_for(*match_text(headline_text(headline_data), word_boundaries))
+
+CATEGORIES = ['culture', 'national', 'international']
+
+# Headlines per work unit in --workers mode
+CHUNK_SIZE = 2000
+
+NYT_SHARD_DIR = 'nyt_shards'
+
+# Per-headline matches from the previous run (see category_cache)
+CATEGORY_CACHE_PATH = 'nyt_category_cache.json.gz'
+
+class JsonArrayWriter:
+    """Stream a JSON array to disk item by item.
+
+    Items go through encode() (which can run in a worker) and then
+    write_encoded(). The bytes are identical to json.dump(items, f, indent=2)
+    for the same items, so streamed and in-memory outputs compare directly.
+    """
+
+    def __init__(self, path):
+        self.f = open(path, 'w')
+        self.count = 0
+
+    @staticmethod
+    def encode(item):
+        """An item as it appears inside the array"""
+        return '\n'.join('  ' + line for line in json.dumps(item, indent=2).split('\n'))
+
+    def write_encoded(self, text):
+        """Append an item already passed through encode()"""
+        self.f.write('[\n' if self.count == 0 else ',\n')
+        self.f.write(text)
+        self.count += 1
+
+    def close(self):
+        self.f.write('\n]' if self.count else '[]')
+        self.f.close()
+
+def output_item(headline_data):
+    """The record written to the category files."""
+    return {
+        'date': headline_data['date'],
+        'title': headline_data['headline'][:200],  # Truncate long headlines
+        'source': 'NY Times',
+        'url': headline_data['url'],
+        'cluster': headline_data['cluster']
+    }
+
+def categorize_chunk(task):
+    """Worker: (category, encoded output item, matches) for one chunk of headlines, plus timing stats.
+
+    Items are encoded here so the parent process only has to write them;
+    matches are the (keywords, exclusions) recorded in the category cache.
+    """
+    chunk_index, headlines, word_boundaries = task
+    start = time.perf_counter()
+    results = []
+    for h in headlines:
+        matches = match_text(headline_text(h), word_boundaries)
+        category = category_for(*matches)
+        results.append((category, JsonArrayWriter.encode(output_item(h)) if category else None, matches))
+    stats = {'pid': os.getpid(), 'headlines': len(headlines), 'seconds': time.perf_counter() - start}
+    return chunk_index, results, stats
+
+def match_all(headlines, word_boundaries=False, workers=1):
+    """Yield (category, encoded item, matches, stats) per headline, in input order.
+
+    stats is the chunk's timing record on its first headline, else None.
+    With workers > 1, chunks are matched in a process pool.
+    """
+    chunks = [(i, headlines[i:i + CHUNK_SIZE], word_boundaries)
+              for i in range(0, len(headlines), CHUNK_SIZE)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() returns results in submission order
+            for chunk_index, results, stats in executor.map(categorize_chunk, chunks):
+                for offset, result in enumerate(results):
+                    yield (*result, stats if offset == 0 else None)
+    else:
+        for chunk in chunks:
+            chunk_index, results, stats = categorize_chunk(chunk)
+            for offset, result in enumerate(results):
+                yield (*result, stats if offset == 0 else None)
+
+def categorize_all(headlines, word_boundaries=False, workers=1, cache=None, keys=None):
+    """Yield (headline, category, encoded item, stats) in input order.
+
+    With a CategoryCache and the headlines' cache keys, headlines that have
+    an entry get their category from its matches; only the others are
+    matched (in a process pool with workers > 1) and added to the cache.
+    """
+    if cache is None:
+        cached = [None] * len(headlines)
+    else:
+        cached = [cache.get(key) for key in keys]
+    results = match_all([h for h, entry in zip(headlines, cached) if entry is None], word_boundaries, workers)
+
+    for i, (h, entry) in enumerate(zip(headlines, cached)):
+        if entry is not None:
+            category = category_for(*entry)
+            yield h, category, JsonArrayWriter.encode(output_item(h)) if category else None, None
+            continue
+        category, text, matches, stats = next(results)
+        if cache is not None:
+            cache.put(keys[i], *matches)
+        yield h, category, text, stats
+    results.close()
+
+def classify_matched(results):
+    """Let a naive Bayes model choose the category of every headline the rules categorized.
+
+    results are categorize_all() tuples. The model is trained on their rule
+    categories with cross_predict(), so no headline is labelled by a model
+    that saw it. Returns the results with the model's categories, and the
+    held-out confusion matrix of rule vs model categories.
+    """
+    matched = [(h, category) for h, category, _, _ in results if category]
+    rule_categories = [category for _, category in matched]
+    predicted = cross_predict([h['headline'][:200] for h, _ in matched],
+                              [CATEGORIES.index(category) for category in rule_categories], FOLDS, CATEGORIES)
+    matrix = confusion_matrix(rule_categories, predicted, CATEGORIES)
+    predicted = iter(predicted)
+    return [(h, next(predicted) if category else None, text, stats)
+            for h, category, text, stats in results], matrix
+
+def write_date_shards(shard_dir, by_month):
+    """Write {date: {category: [headline]}} shards per month plus index.json.
+
+    by_month maps 'YYYY-MM' -> date -> category -> [{'title', 'url', 'cluster'}]. The
+    index lists each month's shard path and the days of the month that have
+    headlines, so a client knows whether a fetch is needed at all.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    months = {}
+    for month in sorted(by_month):
+        rel_path = f"{month}.json"
+        with open(shard_dir / rel_path, 'w') as f:
+            json.dump(by_month[month], f, ensure_ascii=False)
+        months[month] = {
+            'path': rel_path,
+            'days': sorted(int(date_key[8:10]) for date_key in by_month[month])
+        }
+
+    with open(shard_dir / "index.json", 'w') as f:
+        json.dump({'categories': CATEGORIES, 'months': months}, f)
+
+    return months
+
+def print_worker_stats(worker_stats, wall_seconds, total):
+    """Per-worker throughput, from the chunk timing records."""
+    print(f"\nWorkers ({total / wall_seconds:,.0f} headlines/s overall, {wall_seconds:.2f}s wall):")
+    for n, (pid, stats) in enumerate(sorted(worker_stats.items()), 1):
+        rate = stats['headlines'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"  worker {n} (pid {pid}): {stats['chunks']} chunks, {stats['headlines']} headlines, "
+              f"{stats['seconds']:.2f}s busy, {rate:,.0f} headlines/s")
+
 def main():
+    parser = argparse.ArgumentParser(description="Categorize NY Times headlines")
+    parser.add_argument('--word-boundaries', action='store_true',
+                        help="only match keywords as whole words")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="categorize chunks of headlines in this many processes")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"match every headline again instead of updating {CATEGORY_CACHE_PATH}")
+    parser.add_argument('--classifier', action='store_true',
+                        help="choose categories with a naive Bayes model trained on this run's "
+                             "keyword categories instead of the keyword vote")
+    args = parser.parse_args()
+    if args.classifier and np is None:
+        parser.error("--classifier needs NumPy")
+
     with open('nyt_headlines_1933-1957.json', 'r') as f:
         headlines = json.load(f)
 
     print(f"Processing {len(headlines)} headlines...")
 
-    # Categorize all headlines
-    culture = []
-    national = []
-    international = []
+    # Near-duplicate clusters over all headlines, before they are split by category
+    start = time.perf_counter()
+    clusters = cluster_ids([h['date'] for h in headlines], [h['headline'] for h in headlines])
+    for h, cluster in zip(headlines, clusters):
+        h['cluster'] = cluster
+    sizes = cluster_sizes(clusters)
+    print(f"Near-duplicates: {sum(sizes.values())} headlines in {len(sizes)} clusters "
+          f"({time.perf_counter() - start:.2f}s)")
+
+    # Matches from the previous run, brought up to date with keyword and
+    # exclusion edits; only headlines without an entry are matched in full
+    start = time.perf_counter()
+    texts = [headline_text(h) for h in headlines]
+    keys = [text_key(text) for text in texts]
+    cache = None if args.no_cache else CategoryCache.load(CATEGORY_CACHE_PATH, args.word_boundaries)
+    if cache is None:
+        cache = CategoryCache(KEYWORD_LABELS, EXCLUDE_PATTERNS, args.word_boundaries)
+    else:
+        changes = cache.update_rules(KEYWORD_LABELS, EXCLUDE_PATTERNS, dict(zip(keys, texts)))
+        print(f"Category cache: {len(cache)} headline entries, {changes['changed']} updated "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        for change in ['added_keywords', 'removed_keywords', 'added_patterns', 'removed_patterns']:
+            if changes[change]:
+                print(f"  {change.replace('_', ' ')}: {', '.join(changes[change])}")
+
+    # Categorize all headlines, streaming each category to its file
+    writers = {category: JsonArrayWriter(f'nyt_{category}.json') for category in CATEGORIES}
+    samples = {category: [] for category in CATEGORIES}
+    by_month = {}
     uncategorized = 0
+    worker_stats = {}
+    start = time.perf_counter()
 
-    for h in headlines:
-        category = categorize_headline(h)
+    results = categorize_all(headlines, args.word_boundaries, args.workers, cache, keys)
+    if args.classifier:
+        results, matrix = classify_matched(list(results))
+        print(f"\nKeyword rules vs classifier (held out, {FOLDS} folds):")
+        print_confusion(matrix, CATEGORIES)
 
-        item = {
-            'date': h['date'],
-            'title': h['headline'][:200],  # Truncate long headlines
-            'source': 'NY Times',
-            'url': h['url']
-        }
+    for h, category, text, stats in results:
+        if stats:
+            totals = worker_stats.setdefault(stats['pid'], {'chunks': 0, 'headlines': 0, 'seconds': 0.0})
+            totals['chunks'] += 1
+            totals['headlines'] += stats['headlines']
+            totals['seconds'] += stats['seconds']
 
-        if category == 'culture':
-            culture.append(item)
-        elif category == 'national':
-            national.append(item)
-        elif category == 'international':
-            international.append(item)
-        else:
+        if category not in writers:
             uncategorized += 1
+            continue
 
-    print(f"\nResults:")
-    print(f"  Culture: {len(culture)}")
-    print(f"  National: {len(national)}")
-    print(f"  International: {len(international)}")
-    print(f"  Uncategorized: {uncategorized}")
+        writers[category].write_encoded(text)
+        date_key = h['date']
+        if len(date_key) == 10:
+            day_headlines = by_month.setdefault(date_key[:7], {}).setdefault(date_key, {})
+            day_headlines.setdefault(category, []).append({
+                'title': h['headline'][:200],
+                'url': h['url'],
+                'cluster': h['cluster']
+            })
+        if len(samples[category]) < 3:
+            samples[category].append(output_item(h))
 
-    # Save categorized headlines
-    with open('nyt_culture.json', 'w') as f:
-        json.dump(culture, f, indent=2)
+    for writer in writers.values():
+        writer.close()
+    wall_seconds = time.perf_counter() - start
+    cache.save(CATEGORY_CACHE_PATH)
 
-    with open('nyt_national.json', 'w') as f:
-        json.dump(national, f, indent=2)
+    print(f"\nResults:")
+    print(f"  Culture: {writers['culture'].count}")
+    print(f"  National: {writers['national'].count}")
+    print(f"  International: {writers['international'].count}")
+    print(f"  Uncategorized: {uncategorized}")
+    matched = sum(stats['headlines'] for stats in worker_stats.values())
+    print(f"  Matched in full: {matched}, from cache: {len(headlines) - matched}")
 
-    with open('nyt_international.json', 'w') as f:
-        json.dump(international, f, indent=2)
+    months = write_date_shards(NYT_SHARD_DIR, by_month)
 
     print("\nSaved to: nyt_culture.json, nyt_national.json, nyt_international.json")
+    print(f"Date shards: {len(months)} months in {NYT_SHARD_DIR}/ (index.json)")
+
+    print_worker_stats(worker_stats, wall_seconds, len(headlines))
 
     # Show samples
     print("\n--- Culture samples ---")
-    for h in culture[:3]:
+    for h in samples['culture']:
         print(f"  {h['date']}: {h['title'][:70]}...")
 
     print("\n--- National samples ---")
-    for h in national[:3]:
+    for h in samples['national']:
         print(f"  {h['date']}: {h['title'][:70]}...")
 
     print("\n--- International samples ---")
-    for h in international[:3]:
+    for h in samples['international']:
         print(f"  {h['date']}: {h['title'][:70]}...")
 
 if __name__ == '__main__':
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Per-headline match cache for categorize_nyt.
+
+For every headline text the cache keeps the keywords it matches and the
+exclusion patterns that hit it, keyed by a hash of the text, together with
+the keyword set and patterns those matches were computed with. Categories
+are derived from the matches, so moving a keyword between categories needs
+no matching at all. When keywords or patterns are added or removed,
+update_rules() re-evaluates only those: removed ones are dropped from the
+headlines listed under them in an inverted keyword -> headline map, added
+ones are searched for in the cached texts directly.
+
+Entries are only valid for the word_boundaries mode they were matched in;
+load() returns None for a cache written in the other mode.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from keyword_automaton import KeywordAutomaton
+
+CACHE_VERSION = 1
+
+
+def text_key(text):
+    """Cache key for a headline text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class CategoryCache:
+    """{text key: (matched keywords, matching exclusion patterns)} for one rule set."""
+
+    def __init__(self, keywords, patterns, word_boundaries=False, entries=None):
+        self.keywords = set(keywords)
+        self.patterns = list(patterns)
+        self.word_boundaries = word_boundaries
+        self.entries = {}
+        # Inverted maps: keyword / pattern -> keys of the entries that match it
+        self.keyword_index = {}
+        self.pattern_index = {}
+        for key, (matched, hits) in (entries or {}).items():
+            self.put(key, matched, hits)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path, word_boundaries=False):
+        """The cache at path, or None if it is missing or was written for another mode"""
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CACHE_VERSION or data['word_boundaries'] != word_boundaries:
+            return None
+        return cls(data['keywords'], data['patterns'], word_boundaries, data['entries'])
+
+    def save(self, path):
+        text = json.dumps({
+            'version': CACHE_VERSION,
+            'word_boundaries': self.word_boundaries,
+            'keywords': sorted(self.keywords),
+            'patterns': self.patterns,
+            'entries': {key: [sorted(keywords), sorted(patterns)] for key, (keywords, patterns) in self.entries.items()},
+        }, ensure_ascii=False, separators=(',', ':'))
+        with gzip.open(str(path) + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(str(path) + '.tmp', path)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, keywords, patterns):
+        self.entries[key] = (set(keywords), set(patterns))
+        for keyword in keywords:
+            self.keyword_index.setdefault(keyword, set()).add(key)
+        for pattern in patterns:
+            self.pattern_index.setdefault(pattern, set()).add(key)
+
+    def update_rules(self, keywords, patterns, texts_by_key):
+        """Bring the cached entries up to date with a new keyword set and pattern list.
+
+        texts_by_key holds the texts of the headlines in use; entries for
+        other keys are dropped rather than updated. Returns the added and removed keywords and patterns and the number
+        of entries whose matches changed.
+        """
+        keywords, patterns = set(keywords), list(patterns)
+        added_keywords = sorted(keywords - self.keywords)
+        removed_keywords = sorted(self.keywords - keywords)
+        added_patterns = [p for p in patterns if p not in self.patterns]
+        removed_patterns = [p for p in self.patterns if p not in patterns]
+        changed = set()
+
+        for key in [key for key in self.entries if key not in texts_by_key]:
+            matched, hits = self.entries.pop(key)
+            for keyword in matched:
+                self.keyword_index[keyword].discard(key)
+            for pattern in hits:
+                self.pattern_index[pattern].discard(key)
+
+        for keyword in removed_keywords:
+            for key in self.keyword_index.pop(keyword, ()):
+                self.entries[key][0].discard(keyword)
+                changed.add(key)
+        for pattern in removed_patterns:
+            for key in self.pattern_index.pop(pattern, ()):
+                self.entries[key][1].discard(pattern)
+                changed.add(key)
+
+        texts = [(key, text) for key, text in texts_by_key.items() if key in self.entries]
+        if added_keywords:
+            # Substring tests find every candidate, and are the whole test
+            # without word boundaries; the automaton checks those on candidates
+            candidates = set()
+            for keyword in added_keywords:
+                candidates.update([key for key, text in texts if keyword in text])
+            automaton = KeywordAutomaton({'added': added_keywords}, True) if self.word_boundaries else None
+            for key in candidates:
+                text = texts_by_key[key]
+                if automaton:
+                    found = [automaton.keywords[i] for i in automaton.matches(text)]
+                else:
+                    found = [keyword for keyword in added_keywords if keyword in text]
+                for keyword in found:
+                    self.entries[key][0].add(keyword)
+                    self.keyword_index.setdefault(keyword, set()).add(key)
+                if found:
+                    changed.add(key)
+
+        for pattern in added_patterns:
+            search = re.compile(pattern, re.IGNORECASE).search
+            for key, text in texts:
+                if search(text):
+                    self.entries[key][1].add(pattern)
+                    self.pattern_index.setdefault(pattern, set()).add(key)
+                    changed.add(key)
+
+        self.keywords, self.patterns = keywords, patterns
+        return {
+            'added_keywords': added_keywords,
+            'removed_keywords': removed_keywords,
+            'added_patterns': added_patterns,
+            'removed_patterns': removed_patterns,
+            'changed': len(changed),
+        }
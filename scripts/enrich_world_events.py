@@ -4,9 +4,10 @@ Enrich world events data with more details.
 Add descriptions, topics, locations, and sources.
 """
 
-import json
 from datetime import datetime
 
+from archive_stream import ArchiveRewriter
+
 ARCHIVE_FILE = "../bmc_complete_archive.json"
 OUTPUT_FILE = "../bmc_complete_archive.json"
 
@@ -1299,57 +1300,75 @@ def main():
     print("ENRICHING WORLD EVENTS DATA")
     print("=" * 70)
 
-    # Load archive
+    # Stream the archive one year at a time
     print("\nLoading archive...")
-    with open(ARCHIVE_FILE, 'r', encoding='utf-8') as f:
-        archive = json.load(f)
+    rewriter = ArchiveRewriter(ARCHIVE_FILE, OUTPUT_FILE)
 
-    if 'daily_calendar' not in archive:
-        archive['daily_calendar'] = {}
+    # Group historical events by year
+    events_by_year = {}
+    for date_key, events in HISTORICAL_EVENTS.items():
+        events_by_year.setdefault(date_key[:4], []).append((date_key, events))
 
     # Add enriched events
     added = 0
     updated = 0
 
-    print("\nAdding historical events...")
-    for date_key, events in HISTORICAL_EVENTS.items():
-        year = date_key[:4]
+    # Statistics
+    total_world = 0
+    total_usa = 0
+    by_year = {}
 
-        # Ensure year structure exists
-        if year not in archive['daily_calendar']:
-            archive['daily_calendar'][year] = {}
+    def enrich_year(year, days):
+        nonlocal added, updated, total_world, total_usa
+        for date_key, events in events_by_year.pop(year, []):
+            if date_key not in days:
+                days[date_key] = {
+                    'bmc_events': [],
+                    'world_events': []
+                }
 
-        if date_key not in archive['daily_calendar'][year]:
-            archive['daily_calendar'][year][date_key] = {
-                'bmc_events': [],
-                'world_events': []
-            }
+            # Ensure world_events exists
+            if 'world_events' not in days[date_key]:
+                days[date_key]['world_events'] = []
 
-        # Ensure world_events exists
-        if 'world_events' not in archive['daily_calendar'][year][date_key]:
-            archive['daily_calendar'][year][date_key]['world_events'] = []
+            # Check if event already exists (by event title)
+            existing_titles = {e.get('event', '').lower() for e in days[date_key]['world_events']}
+
+            for event in events:
+                if event['event'].lower() not in existing_titles:
+                    days[date_key]['world_events'].append(event)
+                    added += 1
+                else:
+                    # Update existing event with more details
+                    for existing in days[date_key]['world_events']:
+                        if existing.get('event', '').lower() == event['event'].lower():
+                            existing.update(event)
+                            updated += 1
+                            break
+
+        for day_data in days.values():
+            for event in day_data.get('world_events', []):
+                if event.get('category') == 'usa':
+                    total_usa += 1
+                else:
+                    total_world += 1
+                by_year[year] = by_year.get(year, 0) + 1
 
-        # Check if event already exists (by event title)
-        existing_titles = {e.get('event', '').lower() for e in archive['daily_calendar'][year][date_key]['world_events']}
+    print("\nAdding historical events...")
+    for year, days in rewriter.years():
+        enrich_year(year, days)
 
-        for event in events:
-            if event['event'].lower() not in existing_titles:
-                archive['daily_calendar'][year][date_key]['world_events'].append(event)
-                added += 1
-            else:
-                # Update existing event with more details
-                for existing in archive['daily_calendar'][year][date_key]['world_events']:
-                    if existing.get('event', '').lower() == event['event'].lower():
-                        existing.update(event)
-                        updated += 1
-                        break
+    # Years that were not in the archive yet
+    for year in sorted(events_by_year):
+        days = {}
+        enrich_year(year, days)
+        rewriter.add_year(year, days)
 
     print(f"  Events added: {added}")
     print(f"  Events updated: {updated}")
 
     # Update metadata
-    archive['metadata'] = archive.get('metadata', {})
-    archive['metadata']['world_events_enriched'] = {
+    rewriter.metadata['world_events_enriched'] = {
         'enriched_at': datetime.now().isoformat(),
         'events_added': added,
         'events_updated': updated,
@@ -1357,25 +1376,10 @@ def main():
     }
 
     # Save updated archive
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(archive, f, indent=2, ensure_ascii=False)
+    rewriter.close()
 
     print(f"\n✓ Archive updated: {OUTPUT_FILE}")
 
-    # Statistics
-    total_world = 0
-    total_usa = 0
-    by_year = {}
-
-    for year, dates in archive.get('daily_calendar', {}).items():
-        for date_key, day_data in dates.items():
-            for event in day_data.get('world_events', []):
-                if event.get('category') == 'usa':
-                    total_usa += 1
-                else:
-                    total_world += 1
-                by_year[year] = by_year.get(year, 0) + 1
-
     print(f"\nTotal events: {total_usa + total_world}")
     print(f"  USA: {total_usa}")
     print(f"  International: {total_world}")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Flat, date-sorted event log with a day -> byte offset table.
+
+<path> is NDJSON: one {"date": "YYYY-MM-DD", "kind": ..., "precision": ...,
+"event": {...}} object per line, in date order; coarser events sit on the
+first day of their period. <path>.idx is a sidecar of fixed-size
+little-endian records (int32 day offset since 1933-01-01, int64 byte offset
+of that day's first line), one per distinct date, followed by a sentinel
+holding the length of the log. A reader binary-searches the table, seeks
+straight to the wanted dates and parses only those lines.
+"""
+
+import json
+import os
+import struct
+from bisect import bisect_left, bisect_right
+
+from bmc_dates import day_number, format_days
+
+INDEX_SUFFIX = '.idx'
+INDEX_RECORD = struct.Struct('<iq')
+
+
+def _day(value):
+    """Day offset for an ISO date string or date; integers pass through"""
+    if isinstance(value, str) or hasattr(value, 'isoformat'):
+        return day_number(str(value)[:10])
+    return int(value)
+
+
+class EventLogWriter:
+    """Write an event log and its offset table; events must come in date order.
+
+    Like ArchiveWriter, both files are written to temporaries that replace
+    the targets on close.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.index_path = self.path + INDEX_SUFFIX
+        self.f = open(self.path + '.tmp', 'wb')
+        self.index = []
+        self.last_day = None
+        self.count = 0
+
+    def add(self, date_key, kind, event, precision='day'):
+        day = day_number(date_key)
+        if self.last_day is not None and day < self.last_day:
+            raise ValueError(f"{self.path}: {date_key} written after {format_days([self.last_day])[0]}")
+        if day != self.last_day:
+            self.index.append((day, self.f.tell()))
+            self.last_day = day
+        line = {'date': date_key, 'kind': kind, 'precision': precision, 'event': event}
+        self.f.write(json.dumps(line, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.count += 1
+
+    def close(self):
+        sentinel = (self.last_day + 1 if self.last_day is not None else 0, self.f.tell())
+        self.f.close()
+        with open(self.index_path + '.tmp', 'wb') as f:
+            for day, offset in self.index + [sentinel]:
+                f.write(INDEX_RECORD.pack(day, offset))
+        os.replace(self.path + '.tmp', self.path)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def abort(self):
+        self.f.close()
+        os.remove(self.path + '.tmp')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        elif not self.f.closed:
+            self.close()
+
+
+class EventLogReader:
+    """Date and range lookups over an event log written by EventLogWriter.
+
+    Only the offset table is loaded up front; queries read and parse just
+    the lines for the requested dates.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path + INDEX_SUFFIX, 'rb') as f:
+            records = list(INDEX_RECORD.iter_unpack(f.read()))
+        # days excludes the sentinel, offsets includes it
+        self.days = [day for day, _ in records[:-1]]
+        self.offsets = [offset for _, offset in records]
+
+    def __len__(self):
+        return len(self.days)
+
+    def dates(self):
+        """ISO dates that have at least one event"""
+        return format_days(self.days)
+
+    def _read(self, i, j):
+        """Parse the lines for index entries i..j-1"""
+        if i >= j:
+            return []
+        start, end = self.offsets[i], self.offsets[j]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def events_on(self, date_key):
+        """Events logged on one date (ISO string or day offset)"""
+        day = _day(date_key)
+        i = bisect_left(self.days, day)
+        if i == len(self.days) or self.days[i] != day:
+            return []
+        return self._read(i, i + 1)
+
+    def events_between(self, first, last):
+        """Events logged from first to last, both inclusive"""
+        return self._read(bisect_left(self.days, _day(first)), bisect_right(self.days, _day(last)))
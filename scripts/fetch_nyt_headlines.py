@@ -3,17 +3,41 @@
 Fetch NY Times front page headlines from September 1933 to October 1957.
 Requires a free API key from https://developer.nytimes.com
 
+Months are fetched concurrently under a token bucket that matches the API
+quota (5 requests per minute by default). Rate limits and server errors are
+retried with bounded exponential backoff. Each finished month is saved as a
+checkpoint under --checkpoint-dir, so an interrupted run picks up where it
+stopped. --base-url points the fetcher at a local stand-in server for testing.
+
+Raw monthly responses are kept gzip-compressed in --cache-dir, keyed by
+year and month; cached months are never requested again. --offline replays
+the front page filter and headline extraction over the cache without any
+API calls, so heuristics can be changed and re-run in seconds.
+
+Monthly payloads are decoded as a stream, from the socket or the gzip
+cache: articles are filtered and reduced to headline data one at a time, so
+a whole month of docs is never held in memory.
+
 Usage:
     python3 fetch_nyt_headlines.py YOUR_API_KEY
+    python3 fetch_nyt_headlines.py --offline
+    python3 fetch_nyt_headlines.py YOUR_API_KEY --base-url http://localhost:8000/svc/archive/v1 --rate 600
 """
 
+import argparse
+import asyncio
+import gzip
+import http.client
 import json
-import sys
+import os
+import random
+import ssl
 import time
-import urllib.request
 import urllib.error
-import ssl
-from datetime import datetime
+import urllib.request
+from pathlib import Path
+
+from archive_stream import JsonStreamReader
 
 # SSL context to handle certificate issues
 ssl_context = ssl.create_default_context()
@@ -21,26 +45,140 @@ ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
 API_BASE = "https://api.nytimes.com/svc/archive/v1"
-
-def fetch_month(year, month, api_key):
-    """Fetch all articles for a given month."""
-    url = f"{API_BASE}/{year}/{month}.json?api-key={api_key}"
-
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'BMC Research Bot'})
-        with urllib.request.urlopen(req, timeout=60, context=ssl_context) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            return data.get('response', {}).get('docs', [])
-    except urllib.error.HTTPError as e:
-        if e.code == 429:
-            print(f"    Rate limited, waiting 60s...")
-            time.sleep(60)
-            return fetch_month(year, month, api_key)
-        print(f"    HTTP Error {e.code}: {e.reason}")
-        return []
-    except Exception as e:
-        print(f"    Error: {e}")
-        return []
+CHECKPOINT_DIR = "nyt_checkpoints"
+CACHE_DIR = "nyt_raw_cache"
+OUTPUT_FILE = "nyt_headlines_1933-1957.json"
+
+# September 1933 to October 1957
+START_MONTH = (1933, 9)
+END_MONTH = (1957, 10)
+
+# Archive API quota: 5 requests per minute
+REQUESTS_PER_MINUTE = 5
+
+# Streaming decode reads this much of a payload at a time
+STREAM_CHUNK = 64 * 1024
+
+# Retries for 429s, 5xx and network errors: 2s, 4s, 8s, ... capped at 2 minutes
+MAX_RETRIES = 6
+BACKOFF_BASE = 2
+BACKOFF_MAX = 120
+
+class TokenBucket:
+    """Async token bucket: refills `rate` tokens per second, holds at most `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry `attempt` (0-based), honoring Retry-After."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+    if retry_after and str(retry_after).isdigit():
+        delay = max(delay, min(BACKOFF_MAX, int(retry_after)))
+    return delay
+
+def cache_path(cache_dir, year, month):
+    return Path(cache_dir) / f"{year}-{month:02d}.json.gz"
+
+class TeeReader:
+    """File-like wrapper that copies everything read from `stream` into `sink`."""
+
+    def __init__(self, stream, sink):
+        self.stream = stream
+        self.sink = sink
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.sink.write(data)
+        return data
+
+def iter_docs(stream):
+    """Yield the articles of an archive payload ({"response": {"docs": [...]}}) one by one.
+
+    stream is any readable file object (socket response, gzip file, ...).
+    """
+    reader = JsonStreamReader(stream, chunk_size=STREAM_CHUNK)
+    reader.expect('{')
+    for key in reader.members():
+        if key != 'response':
+            reader.value()
+            continue
+        reader.expect('{')
+        for response_key in reader.members():
+            if response_key != 'docs':
+                reader.value()
+                continue
+            reader.expect('[')
+            yield from reader.items()
+
+def load_cached_month(cache_dir, year, month):
+    """select_headlines() over a cached monthly response."""
+    with gzip.open(cache_path(cache_dir, year, month), 'rb') as f:
+        return select_headlines(iter_docs(f))
+
+def fetch_month(year, month, api_key, base_url=API_BASE, cache_dir=None):
+    """Fetch a month and reduce it with select_headlines() as it streams in.
+
+    Raises on HTTP and network errors. With cache_dir, the raw response is
+    also saved there, gzip-compressed; the cache file only appears once the
+    whole payload has been read.
+    """
+    url = f"{base_url}/{year}/{month}.json?api-key={api_key}"
+
+    req = urllib.request.Request(url, headers={'User-Agent': 'BMC Research Bot'})
+    with urllib.request.urlopen(req, timeout=60, context=ssl_context) as response:
+        if not cache_dir:
+            return select_headlines(iter_docs(response))
+
+        path = cache_path(cache_dir, year, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.gz.tmp')
+        try:
+            with gzip.open(tmp_path, 'wb') as sink:
+                result = select_headlines(iter_docs(TeeReader(response, sink)))
+                # Keep anything after the docs array too, so the cache is the full body
+                sink.write(response.read())
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, path)
+        return result
+
+async def fetch_month_with_retry(year, month, api_key, base_url, bucket, cache_dir=None):
+    """fetch_month() under the rate limit, retrying transient failures."""
+    for attempt in range(MAX_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            return await asyncio.to_thread(fetch_month, year, month, api_key, base_url, cache_dir)
+        except urllib.error.HTTPError as e:
+            if e.code != 429 and e.code < 500:
+                raise
+            reason = "rate limited" if e.code == 429 else f"HTTP {e.code}"
+            delay = backoff_delay(attempt, e.headers.get('Retry-After') if e.headers else None)
+        except (urllib.error.URLError, http.client.HTTPException, TimeoutError, ConnectionError) as e:
+            reason = f"{e}"
+            delay = backoff_delay(attempt)
+
+        if attempt == MAX_RETRIES:
+            raise RuntimeError(f"giving up after {MAX_RETRIES} retries ({reason})")
+        print(f"    {year}-{month:02d}: {reason}, retrying in {delay:.0f}s...")
+        await asyncio.sleep(delay)
 
 def is_front_page_news(article):
     """Check if article is front page or major news."""
@@ -97,80 +235,189 @@ def extract_headline_data(article):
         'url': article.get('web_url', '')
     }
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 fetch_nyt_headlines.py YOUR_API_KEY")
-        print("\nGet your free API key at: https://developer.nytimes.com")
-        sys.exit(1)
-
-    api_key = sys.argv[1]
-
-    print("=" * 70)
-    print("NY Times Headlines Fetcher (1933-1957)")
-    print("=" * 70)
-
-    all_headlines = []
+def select_headlines(articles):
+    """Front page headlines for one month, at most 3 per day.
 
-    # September 1933 to October 1957
-    start_year, start_month = 1933, 9
-    end_year, end_month = 1957, 10
-
-    year, month = start_year, start_month
-
-    while (year < end_year) or (year == end_year and month <= end_month):
-        print(f"Fetching {year}-{month:02d}...", end=" ", flush=True)
-
-        articles = fetch_month(year, month, api_key)
-        print(f"got {len(articles)} articles", end=" ", flush=True)
+    articles can be any iterable (e.g. iter_docs()); each article is
+    filtered and extracted as it arrives and then dropped.
+    Returns (headlines, article_count, front_page_count).
+    """
+    article_count = 0
+    front_page = 0
+    month_headlines = []
+    for article in articles:
+        article_count += 1
 
         # Filter for front page news
-        front_page = [a for a in articles if is_front_page_news(a)]
-        print(f"({len(front_page)} front page)", end=" ", flush=True)
+        if not is_front_page_news(article):
+            continue
+        front_page += 1
 
         # Extract headline data
-        month_headlines = []
-        for article in front_page:
-            data = extract_headline_data(article)
-            if data:
-                month_headlines.append(data)
-
-        # Keep top headlines per day (max 3 per day)
-        by_date = {}
-        for h in month_headlines:
-            date = h['date']
-            if date not in by_date:
-                by_date[date] = []
-            if len(by_date[date]) < 3:
-                by_date[date].append(h)
-
-        for headlines in by_date.values():
-            all_headlines.extend(headlines)
-
-        print(f"-> {sum(len(v) for v in by_date.values())} kept")
-
-        # Rate limiting: 5 requests per minute max
-        time.sleep(12)
-
-        # Next month
+        data = extract_headline_data(article)
+        if data:
+            month_headlines.append(data)
+
+    # Keep top headlines per day (max 3 per day)
+    by_date = {}
+    for h in month_headlines:
+        date = h['date']
+        if date not in by_date:
+            by_date[date] = []
+        if len(by_date[date]) < 3:
+            by_date[date].append(h)
+
+    headlines = []
+    for day_headlines in by_date.values():
+        headlines.extend(day_headlines)
+    return headlines, article_count, front_page
+
+def month_range(start, end):
+    """(year, month) pairs from start to end inclusive."""
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
         month += 1
         if month > 12:
             month = 1
             year += 1
 
+def checkpoint_path(checkpoint_dir, year, month):
+    return Path(checkpoint_dir) / f"{year}-{month:02d}.json"
+
+def write_checkpoint(checkpoint_dir, year, month, record):
+    """Save one finished month; written to a temp file first so it is never partial."""
+    path = checkpoint_path(checkpoint_dir, year, month)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(checkpoint_dir, year, month):
+    path = checkpoint_path(checkpoint_dir, year, month)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_month(checkpoint_dir, year, month, selected):
+    """Checkpoint one month's select_headlines() result."""
+    headlines, article_count, front_page = selected
+    write_checkpoint(checkpoint_dir, year, month, {
+        'year': year,
+        'month': month,
+        'articles': article_count,
+        'front_page': front_page,
+        'headlines': headlines
+    })
+    print(f"  {year}-{month:02d}: got {article_count} articles "
+          f"({front_page} front page) -> {len(headlines)} kept")
+
+async def fetch_all(months, api_key, base_url, checkpoint_dir, rate_per_minute, concurrency,
+                    cache_dir=None):
+    """Fetch every month without a checkpoint; returns the months that failed.
+
+    Months already in cache_dir are read from it instead of the API.
+    """
+    Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
+    todo = [(y, m) for y, m in months if not checkpoint_path(checkpoint_dir, y, m).exists()]
+    print(f"{len(months) - len(todo)} months already checkpointed, {len(todo)} to fetch")
+
+    bucket = TokenBucket(rate_per_minute / 60)
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = []
+
+    async def run(year, month):
+        async with semaphore:
+            try:
+                if cache_dir and cache_path(cache_dir, year, month).exists():
+                    selected = await asyncio.to_thread(load_cached_month, cache_dir, year, month)
+                else:
+                    selected = await fetch_month_with_retry(year, month, api_key, base_url,
+                                                            bucket, cache_dir)
+            except Exception as e:
+                print(f"  {year}-{month:02d}: failed: {e}")
+                failed.append((year, month))
+                return
+
+            save_month(checkpoint_dir, year, month, selected)
+
+    await asyncio.gather(*(run(year, month) for year, month in todo))
+    return sorted(failed)
+
+def replay_cache(months, checkpoint_dir, cache_dir):
+    """Re-run filtering and extraction over every cached month; returns the uncached ones."""
+    Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
+    missing = []
+    for year, month in months:
+        if not cache_path(cache_dir, year, month).exists():
+            missing.append((year, month))
+            continue
+        save_month(checkpoint_dir, year, month, load_cached_month(cache_dir, year, month))
+    return missing
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch NY Times front page headlines (1933-1957)")
+    parser.add_argument('api_key', nargs='?',
+                        help="NYT developer API key (https://developer.nytimes.com)")
+    parser.add_argument('--base-url', default=API_BASE,
+                        help="archive API base URL, e.g. a local stand-in server")
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_MINUTE,
+                        help="requests per minute allowed by the API quota")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="requests in flight at once")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR,
+                        help="directory of per-month checkpoints; finished months are skipped")
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help="directory of gzip-compressed raw monthly responses")
+    parser.add_argument('--offline', action='store_true',
+                        help="re-extract headlines from the raw cache only, without API calls")
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if not args.offline and not args.api_key:
+        parser.error("an API key is required unless --offline is given")
+
+    print("=" * 70)
+    print("NY Times Headlines Fetcher (1933-1957)")
+    print("=" * 70)
+
+    months = list(month_range(START_MONTH, END_MONTH))
+    if args.offline:
+        print(f"Offline: re-extracting from {args.cache_dir}")
+        failed = replay_cache(months, args.checkpoint_dir, args.cache_dir)
+    else:
+        failed = asyncio.run(fetch_all(months, args.api_key, args.base_url, args.checkpoint_dir,
+                                       args.rate, args.concurrency, args.cache_dir))
+
+    # Assemble the output from checkpoints
+    all_headlines = []
+    for year, month in months:
+        record = load_checkpoint(args.checkpoint_dir, year, month)
+        if record:
+            all_headlines.extend(record['headlines'])
+
     # Sort by date
     all_headlines.sort(key=lambda x: x['date'])
 
     # Save results
-    output_file = 'nyt_headlines_1933-1957.json'
-    with open(output_file, 'w') as f:
+    with open(args.output, 'w') as f:
         json.dump(all_headlines, f, indent=2)
 
     print()
     print("=" * 70)
-    print(f"COMPLETE")
+    if not failed:
+        print("COMPLETE")
+    elif args.offline:
+        print(f"INCOMPLETE: {len(failed)} months not in the cache (kept their previous checkpoints)")
+    else:
+        print(f"INCOMPLETE: {len(failed)} months failed, rerun to retry")
     print("=" * 70)
+    if failed:
+        print(("Uncached" if args.offline else "Failed") + " months: "
+              + ", ".join(f"{y}-{m:02d}" for y, m in failed))
     print(f"Total headlines: {len(all_headlines)}")
-    print(f"Saved to: {output_file}")
+    print(f"Saved to: {args.output}")
 
     # Show sample
     print("\nSample headlines:")
@@ -1,95 +1,50 @@
 #!/usr/bin/env python3
 """
 Generate comprehensive daily chronology from chronos 2 data
+
+Every event is emitted once as a [start, end] interval with its date
+precision, in start order, next to an interval index over those intervals
+(see interval_index.py). Only day-precision events are also filed under
+their date in the daily calendar, so month-, year- and academic-year events
+no longer pile up on synthetic first days.
 """
 
 import json
-import re
 from collections import defaultdict
 from datetime import datetime, timedelta
 
+from bmc_dates import EPOCH, PRECISION_NAMES, day_number, format_days, in_range, parse_batch
+from event_log import EventLogWriter
+from interval_index import IntervalIndex
+
 # Load the most comprehensive file
 CHRONOS_PATH = "/Users/sylvain/Documents/DATA BMC/chronos 2/bmc_chronology_wikipedia.json"
 PEOPLE_PATH = "/Users/sylvain/Documents/DATA BMC/chronos 2/bmc_people_index.json"
 OUTPUT_PATH = "/Users/sylvain/Documents/BMC-RADIO-SITE/bmc_chronos_complete.json"
-
-def parse_date(date_str, precision):
-    """Parse various date formats and return list of (date_key, is_exact)"""
-    dates = []
-
-    if not date_str:
-        return dates
-
-    # Exact date: "1933-01-05" or "October 16, 1933"
-    if precision in ['day', 'exact']:
-        # Try ISO format
-        match = re.match(r'^(\d{4})-(\d{2})-(\d{2})$', date_str)
-        if match:
-            dates.append((date_str, True))
-            return dates
-
-        # Try "Month Day, Year" format
-        match = re.match(r'^([A-Za-z]+)\s+(\d+),?\s+(\d{4})$', date_str)
-        if match:
-            month_name, day, year = match.groups()
-            months = {'January': '01', 'February': '02', 'March': '03', 'April': '04',
-                     'May': '05', 'June': '06', 'July': '07', 'August': '08',
-                     'September': '09', 'October': '10', 'November': '11', 'December': '12'}
-            if month_name in months:
-                date_key = f"{year}-{months[month_name]}-{int(day):02d}"
-                dates.append((date_key, True))
-                return dates
-
-    # Month precision: "March 1935"
-    if precision == 'month':
-        match = re.match(r'^([A-Za-z]+)\s+(\d{4})$', date_str)
-        if match:
-            month_name, year = match.groups()
-            months = {'January': '01', 'February': '02', 'March': '03', 'April': '04',
-                     'May': '05', 'June': '06', 'July': '07', 'August': '08',
-                     'September': '09', 'October': '10', 'November': '11', 'December': '12'}
-            if month_name in months:
-                # Use first day of month
-                date_key = f"{year}-{months[month_name]}-01"
-                dates.append((date_key, False))
-                return dates
-
-    # Year precision: "1933"
-    if precision == 'year':
-        match = re.match(r'^(\d{4})$', date_str)
-        if match:
-            year = match.group(1)
-            # Use January 1st
-            date_key = f"{year}-01-01"
-            dates.append((date_key, False))
-            return dates
-
-    # Academic year: "1933-1934" or "1946-47"
-    match = re.match(r'^(\d{4})-(\d{2,4})$', date_str)
-    if match:
-        year1 = match.group(1)
-        # Use September 1st (start of academic year)
-        date_key = f"{year1}-09-01"
-        dates.append((date_key, False))
-        return dates
-
-    # Approximate: "1930s", "early 1930s"
-    match = re.search(r'(\d{4})s', date_str)
-    if match:
-        decade_start = match.group(1)
-        date_key = f"{decade_start}-01-01"
-        dates.append((date_key, False))
-        return dates
-
-    # Try to extract any year
-    match = re.search(r'(\d{4})', date_str)
-    if match:
-        year = match.group(1)
-        date_key = f"{year}-01-01"
-        dates.append((date_key, False))
-        return dates
-
-    return dates
+EVENT_LOG_PATH = "/Users/sylvain/Documents/BMC-RADIO-SITE/bmc_chronos_events.ndjson"
+
+def build_person_table(events, people_index):
+    """Intern person names: people index entries first, then names only seen in events.
+
+    Returns (names, ids) where names[i] is the name for ID i and ids maps back.
+    """
+    names = list(people_index)
+    ids = {name: i for i, name in enumerate(names)}
+    for event in events:
+        for name in event.get('people', []):
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+    return names, ids
+
+def bitset_ids(bits):
+    """Set bit positions of an int bitset, ascending"""
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
 
 def get_certainty(event):
     """Calculate certainty based on source and precision"""
@@ -123,87 +78,123 @@ def main():
 
     print(f"Total events: {len(chronos['events'])}")
 
+    with open(PEOPLE_PATH, 'r') as f:
+        people_index = json.load(f)
+
+    # One ID per person; daily presence is an int bitset over these IDs
+    person_names, person_ids = build_person_table(chronos['events'], people_index)
+    print(f"Interned people: {len(person_names)}")
+
     # Build daily calendar
     daily_calendar = defaultdict(lambda: defaultdict(lambda: {
         'events': [],
-        'people_present': set()
+        'people_present': 0
     }))
 
     events_processed = 0
     events_skipped = 0
 
-    for event in chronos['events']:
-        date_str = event.get('date', '')
-        precision = event.get('date_precision', 'approximate')
+    # Normalize every event date in one batch, then window it to the BMC era
+    # (1933-1957) plus some context
+    events = chronos['events']
+    batch = parse_batch([event.get('date', '') for event in events],
+                        [event.get('date_precision', 'approximate') for event in events])
+    date_keys = format_days(batch.start)
+    end_keys = format_days(batch.end)
+    in_window = in_range(batch, '1919-01-01', '1960-12-31')
 
-        parsed_dates = parse_date(date_str, precision)
+    # Interval records, with their day offsets for the index
+    interval_events, interval_starts, interval_ends = [], [], []
 
-        if not parsed_dates:
+    for i, event in enumerate(events):
+        if not batch.valid[i]:
             events_skipped += 1
             continue
 
-        for date_key, is_exact in parsed_dates:
-            try:
-                year = date_key[:4]
-                year_int = int(year)
-
-                # Only include BMC era (1933-1957) plus some context
-                if year_int < 1919 or year_int > 1960:
-                    continue
-
-                event_entry = {
-                    'description': event.get('event', ''),
-                    'category': event.get('category', 'other'),
-                    'certainty': get_certainty(event),
-                    'source': event.get('source', ''),
-                    'location': event.get('location', ''),
-                    'is_exact_date': is_exact
-                }
-
-                # Add people
-                people = event.get('people', [])
-                if people:
-                    event_entry['people'] = people
-                    daily_calendar[year][date_key]['people_present'].update(people)
-
-                # Add quote if available
-                if event.get('quote'):
-                    event_entry['quote'] = event['quote']
-
-                # Add farm info
-                if event.get('farm_info'):
-                    event_entry['details'] = event['farm_info']
-
-                # Add Wikipedia info for people
-                if event.get('people_wikipedia'):
-                    notable_people = [p for p in event['people_wikipedia']
-                                     if p.get('profession') and len(p.get('profession', [])) > 0]
-                    if notable_people:
-                        event_entry['notable_people'] = [
-                            {
-                                'name': p['name'],
-                                'profession': p.get('profession', []),
-                                'wikipedia': p.get('wikipedia_url', '')
-                            }
-                            for p in notable_people[:3]  # Limit to 3
-                        ]
+        if not in_window[i]:
+            continue
+
+        date_key = date_keys[i]
+        precision = PRECISION_NAMES[batch.precision[i]]
+        is_exact = precision == 'day'
+
+        try:
+            year = date_key[:4]
 
+            event_entry = {
+                'description': event.get('event', ''),
+                'category': event.get('category', 'other'),
+                'certainty': get_certainty(event),
+                'source': event.get('source', ''),
+                'location': event.get('location', ''),
+                'is_exact_date': is_exact
+            }
+
+            # Add people
+            people = event.get('people', [])
+            if people:
+                event_entry['people'] = people
+
+            # Add quote if available
+            if event.get('quote'):
+                event_entry['quote'] = event['quote']
+
+            # Add farm info
+            if event.get('farm_info'):
+                event_entry['details'] = event['farm_info']
+
+            # Add Wikipedia info for people
+            if event.get('people_wikipedia'):
+                notable_people = [p for p in event['people_wikipedia']
+                                 if p.get('profession') and len(p.get('profession', [])) > 0]
+                if notable_people:
+                    event_entry['notable_people'] = [
+                        {
+                            'name': p['name'],
+                            'profession': p.get('profession', []),
+                            'wikipedia': p.get('wikipedia_url', '')
+                        }
+                        for p in notable_people[:3]  # Limit to 3
+                    ]
+
+            interval_events.append({
+                'start': date_key,
+                'end': end_keys[i],
+                'precision': precision,
+                **event_entry
+            })
+            interval_starts.append(batch.start[i])
+            interval_ends.append(batch.end[i])
+
+            if is_exact:
                 daily_calendar[year][date_key]['events'].append(event_entry)
-                events_processed += 1
+                if people:
+                    bits = 0
+                    for name in people:
+                        bits |= 1 << person_ids[name]
+                    daily_calendar[year][date_key]['people_present'] |= bits
+            events_processed += 1
 
-            except Exception as e:
-                events_skipped += 1
-                continue
+        except Exception as e:
+            events_skipped += 1
+            continue
 
     print(f"Events processed: {events_processed}")
     print(f"Events skipped: {events_skipped}")
 
+    # Start-sorted interval index; events are written in the same order
+    index = IntervalIndex(interval_starts, interval_ends)
+    interval_events = [interval_events[i] for i in index.order]
+    exact_events = sum(1 for e in interval_events if e['precision'] == 'day')
+    print(f"Exact-day events: {exact_events}, imprecise (interval) events: {len(interval_events) - exact_events}")
+
     # Convert to final structure
     output = {
         'metadata': {
             'title': 'Black Mountain College Complete Chronology',
             'source': 'chronos 2 - bmc_chronology_wikipedia.json',
             'total_events': events_processed,
+            'exact_day_events': exact_events,
             'date_generated': datetime.now().isoformat(),
             'sources': [
                 'Martin Duberman - Black Mountain: An Exploration in Community (1972)',
@@ -213,6 +204,12 @@ def main():
                 'Wikipedia enrichment'
             ]
         },
+        'events': interval_events,
+        'interval_index': {
+            'epoch': EPOCH.isoformat(),
+            **index.to_dict()
+        },
+        'people_table': person_names,
         'daily_calendar': {}
     }
 
@@ -222,15 +219,15 @@ def main():
         year_data = {}
         for date_key in sorted(daily_calendar[year].keys()):
             day_data = daily_calendar[year][date_key]
-            # Convert set to list
-            people_list = list(day_data['people_present'])
+            # Full roster as IDs into people_table
+            people_ids = bitset_ids(day_data['people_present'])
 
             year_data[date_key] = {
                 'events': day_data['events'],
-                'people_count': len(people_list)
+                'people_count': len(people_ids)
             }
-            if people_list:
-                year_data[date_key]['people'] = sorted(people_list)[:10]  # Top 10
+            if people_ids:
+                year_data[date_key]['people_ids'] = people_ids
 
         if year_data:
             output['daily_calendar'][year] = year_data
@@ -243,6 +240,12 @@ def main():
     with open(OUTPUT_PATH, 'w') as f:
         json.dump(output, f, indent=2, ensure_ascii=False)
 
+    # Flat event log, one line per event keyed by its start date
+    print(f"Writing event log to {EVENT_LOG_PATH}...")
+    with EventLogWriter(EVENT_LOG_PATH) as log:
+        for event in interval_events:
+            log.add(event['start'], 'chronos', event, event['precision'])
+
     # Stats
     total_days = sum(len(dates) for dates in output['daily_calendar'].values())
     print(f"Total days with events: {total_days}")
@@ -257,5 +260,12 @@ def main():
             if events:
                 print(f"    - {events[0]['description'][:60]}...")
 
+    # Interval query example: everything known to overlap a summer session
+    summer = index.overlapping(day_number('1948-07-01'), day_number('1948-08-31'))
+    print(f"\nEvents overlapping 1948-07-01..1948-08-31: {len(summer)}")
+    for i in summer[:5]:
+        e = interval_events[i]
+        print(f"  {e['start']}..{e['end']} ({e['precision']}): {e['description'][:50]}")
+
 if __name__ == '__main__':
     main()
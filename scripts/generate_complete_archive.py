@@ -4,16 +4,36 @@ Generate COMPLETE daily archive for Black Mountain College 1933-1957
 Combines: People, Courses, Events, World History, Weather, Radio
 """
 
+import argparse
+import hashlib
 import json
+import os
+import pickle
 import re
 from collections import defaultdict
-from datetime import datetime, date
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta
 from pathlib import Path
 
+from archive_stream import (DAY_NAMES, SHARD_DIR_NAME, ArchiveReader, ArchiveWriter, ShardWriter, decode_days,
+                            read_shard_manifest, remove_shards, shard_key)
+from event_log import EventLogWriter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Paths
 DATA_BMC = Path("/Users/sylvain/Documents/DATA BMC")
 CHRONOS2 = DATA_BMC / "chronos 2"
 SITE_DIR = Path("/Users/sylvain/Documents/BMC-RADIO-SITE")
+EVENT_LOG_NAME = "bmc_archive_events.ndjson"
+
+# Parsed-people snapshot, stored next to BlackMountainPeople.txt; bump the
+# version whenever parse_people_source() or parse_courses() output changes
+PEOPLE_CACHE_SUFFIX = ".parsed.pickle"
+PEOPLE_CACHE_VERSION = 1
 
 # Academic calendar patterns (approximate)
 SEMESTERS = {
@@ -22,10 +42,9 @@ SEMESTERS = {
     'summer': {'start_month': 6, 'end_month': 8}
 }
 
-def parse_people_file():
+def parse_people_source(people_path):
     """Parse BlackMountainPeople.txt to extract people with dates and courses"""
     people = []
-    people_path = CHRONOS2 / "BlackMountainPeople.txt"
 
     with open(people_path, 'r', encoding='utf-8') as f:
         content = f.read()
@@ -65,7 +84,62 @@ def parse_people_file():
 
         people.append(person)
 
-    print(f"Parsed {len(people)} people from BlackMountainPeople.txt")
+    return people
+
+def load_people_cached(people_path):
+    """Load parsed people from a pickle snapshot, rebuilding it if stale.
+
+    The snapshot records the source's size, mtime and SHA-256. Size and mtime
+    are checked first; if only the mtime moved, the hash decides. Returns
+    (people, status) where status is 'hit' or 'miss'.
+    """
+    cache_path = people_path.with_name(people_path.name + PEOPLE_CACHE_SUFFIX)
+    stat = people_path.stat()
+
+    snapshot = None
+    try:
+        with open(cache_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        pass
+
+    if (isinstance(snapshot, dict)
+            and snapshot.get('version') == PEOPLE_CACHE_VERSION
+            and snapshot.get('size') == stat.st_size):
+        if snapshot.get('mtime_ns') == stat.st_mtime_ns:
+            return snapshot['people'], 'hit'
+        if snapshot.get('sha256') == hash_file(people_path):
+            snapshot['mtime_ns'] = stat.st_mtime_ns
+            write_people_cache(cache_path, snapshot)
+            return snapshot['people'], 'hit'
+
+    people = parse_people_source(people_path)
+    write_people_cache(cache_path, {
+        'version': PEOPLE_CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': hash_file(people_path),
+        'people': people
+    })
+    return people, 'miss'
+
+def write_people_cache(cache_path, snapshot):
+    """Atomically write a parsed-people snapshot"""
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+def parse_people_file(use_cache=True):
+    """Parsed BlackMountainPeople.txt as a list of person dicts (cached)"""
+    people_path = CHRONOS2 / "BlackMountainPeople.txt"
+
+    if use_cache:
+        people, status = load_people_cached(people_path)
+    else:
+        people, status = parse_people_source(people_path), 'disabled'
+
+    print(f"Parsed {len(people)} people from BlackMountainPeople.txt (cache {status})")
     return people
 
 def parse_courses(raw_courses):
@@ -111,63 +185,181 @@ def parse_courses(raw_courses):
 
     return courses
 
-def get_people_present(people, year, month):
-    """Get list of people present at BMC for given year/month"""
-    present = {'faculty': [], 'students': [], 'staff': [], 'guests': []}
-
-    # Determine semester
-    if month >= 9:
-        semester = 'fall'
-    elif month >= 6:
-        semester = 'summer'
-    else:
-        semester = 'spring'
+# Presence engine: day offsets are counted from ARCHIVE_START
+ARCHIVE_START = date(1933, 1, 1)
+ARCHIVE_END = date(1957, 12, 31)
+ROLE_KEYS = ['faculty', 'students', 'staff', 'guests']
+
+def role_code(role):
+    """Map a free-text role to an index into ROLE_KEYS (-1 if unclassified)"""
+    role = (role or '').lower()
+    if 'faculty' in role or 'professor' in role:
+        return 0
+    if 'student' in role:
+        return 1
+    if 'staff' in role:
+        return 2
+    if 'guest' in role:
+        return 3
+    return -1
+
+def day_offset(d):
+    """Integer day offset of a date from ARCHIVE_START"""
+    return (d - ARCHIVE_START).days
+
+def build_presence_table(people):
+    """Build daily headcounts and yearly rosters in a single pass over people.
+
+    Each person becomes an interval [start, end] of day offsets plus a role
+    code; per-role daily counts come from one difference-array/prefix-sum pass.
+    The interval boundaries are kept so callers can skip days where nothing
+    changes.
+    """
+    num_days = day_offset(ARCHIVE_END) + 1
+    first_year, last_year = ARCHIVE_START.year, ARCHIVE_END.year
+
+    starts, ends, roles = [], [], []
+    rosters = {}
 
     for person in people:
         start = person.get('start_year')
-        end = person.get('end_year')
-
         if not start:
             continue
+        end = person.get('end_year') or start
 
-        # Check if person was present
-        if start <= year <= (end or start):
-            role = person.get('role', '').lower()
-
-            entry = {
-                'name': person['name'],
-                'focus': person.get('focus', ''),
-                'bio': person.get('bio', '')[:200] if person.get('bio') else ''
-            }
+        code = role_code(person.get('role', ''))
+        if code < 0:
+            continue
 
-            if 'faculty' in role or 'professor' in role:
-                present['faculty'].append(entry)
-            elif 'student' in role:
-                present['students'].append(entry)
-            elif 'staff' in role:
-                present['staff'].append(entry)
-            elif 'guest' in role:
-                present['guests'].append(entry)
+        lo_year, hi_year = max(start, first_year), min(end, last_year)
+        if lo_year > hi_year:
+            continue
 
-    return present
+        starts.append(day_offset(date(lo_year, 1, 1)))
+        ends.append(day_offset(date(hi_year, 12, 31)))
+        roles.append(code)
 
-def get_courses_for_semester(people, year, semester):
-    """Get all courses being taught in a given semester"""
-    courses_dict = {}
+        entry = {
+            'name': person['name'],
+            'focus': person.get('focus', ''),
+            'bio': person.get('bio', '')[:200] if person.get('bio') else ''
+        }
+        for year in range(lo_year, hi_year + 1):
+            if year not in rosters:
+                rosters[year] = {key: [] for key in ROLE_KEYS}
+            rosters[year][ROLE_KEYS[code]].append(entry)
+
+    if np is not None:
+        diff = np.zeros((len(ROLE_KEYS), num_days + 1), dtype=np.int32)
+        role_arr = np.asarray(roles, dtype=np.int32)
+        np.add.at(diff, (role_arr, np.asarray(starts, dtype=np.int32)), 1)
+        np.add.at(diff, (role_arr, np.asarray(ends, dtype=np.int32) + 1), -1)
+        counts = np.cumsum(diff[:, :num_days], axis=1).tolist()
+    else:
+        diff = [[0] * (num_days + 1) for _ in ROLE_KEYS]
+        for code, lo, hi in zip(roles, starts, ends):
+            diff[code][lo] += 1
+            diff[code][hi + 1] -= 1
+        counts = []
+        for row in diff:
+            running, out = 0, []
+            for delta in row[:num_days]:
+                running += delta
+                out.append(running)
+            counts.append(out)
+
+    print(f"Built presence table for {len(roles)} people over {num_days} days")
+    # Day offsets where some headcount may change
+    boundaries = sorted(set(starts) | {end + 1 for end in ends})
+
+    return {'counts': counts, 'rosters': rosters, 'boundaries': boundaries}
+
+def get_headcounts(presence, day):
+    """Faculty/student/staff/guest counts for a date, read from the presence table"""
+    offset = day_offset(day)
+    return {f"{key}_count": presence['counts'][i][offset] for i, key in enumerate(ROLE_KEYS)}
+
+EMPTY_ROSTER = {key: [] for key in ROLE_KEYS}
+
+def get_people_present(presence, year, month):
+    """Get list of people present at BMC for given year/month (table lookup)"""
+    return presence['rosters'].get(year, EMPTY_ROSTER)
+
+def build_course_index(people):
+    """Invert parsed course records in one pass over people.
+
+    by_semester: (year, semester) -> {(course, teacher): [students]}
+    by_teacher:  teacher -> [(year, semester, course)]
+    by_student:  student -> [(year, semester, course, teacher)]
+    """
+    by_semester = defaultdict(dict)
+    by_teacher = defaultdict(list)
+    by_student = defaultdict(list)
+    teacher_seen = set()  # (teacher, year, semester, course) already in by_teacher
 
     for person in people:
         for course in person.get('courses', []):
-            if course.get('year') == year and course.get('semester') == semester:
-                key = (course.get('course', ''), course.get('teacher', ''))
-                if key not in courses_dict:
-                    courses_dict[key] = {
-                        'course': course.get('course', ''),
-                        'teacher': course.get('teacher', ''),
-                        'students': []
-                    }
-                courses_dict[key]['students'].append(person['name'])
-
-    return list(courses_dict.values())
+            year, semester = course.get('year'), course.get('semester')
+            name, teacher = course.get('course', ''), course.get('teacher', '')
+
+            by_semester[(year, semester)].setdefault((name, teacher), []).append(person['name'])
+            by_student[person['name']].append((year, semester, name, teacher))
+            if teacher and (teacher, year, semester, name) not in teacher_seen:
+                teacher_seen.add((teacher, year, semester, name))
+                by_teacher[teacher].append((year, semester, name))
+
+    return {'by_semester': by_semester, 'by_teacher': by_teacher, 'by_student': by_student}
+
+def get_courses_for_semester(course_index, year, semester):
+    """Get all courses being taught in a given semester"""
+    courses = course_index['by_semester'].get((year, semester), {})
+    return [
+        {'course': course, 'teacher': teacher, 'students': students}
+        for (course, teacher), students in courses.items()
+    ]
+
+def export_course_index(course_index):
+    """JSON-ready form of the course index (string keys, dict records)"""
+    semesters = defaultdict(dict)
+    for year, semester in sorted(course_index['by_semester']):
+        semesters[str(year)][semester] = get_courses_for_semester(course_index, year, semester)
+
+    return {
+        'semesters': semesters,
+        'teachers': {
+            teacher: [{'year': y, 'semester': s, 'course': c} for y, s, c in entries]
+            for teacher, entries in sorted(course_index['by_teacher'].items())
+        },
+        'students': {
+            student: [{'year': y, 'semester': s, 'course': c, 'teacher': t} for y, s, c, t in entries]
+            for student, entries in sorted(course_index['by_student'].items())
+        }
+    }
+
+DATE_KEY_PATTERNS = [
+    ('day', re.compile(r'^\d{4}-\d{2}-\d{2}$')),
+    ('month', re.compile(r'^\d{4}-\d{2}$')),
+    ('year', re.compile(r'^\d{4}$')),
+]
+
+def build_date_index(events_by_date):
+    """Split date-keyed events into exact-day, YYYY-MM and YYYY tables"""
+    index = {precision: defaultdict(list) for precision, _ in DATE_KEY_PATTERNS}
+
+    for date_str, events in events_by_date.items():
+        for precision, pattern in DATE_KEY_PATTERNS:
+            if pattern.match(date_str):
+                index[precision][date_str].extend(events)
+                break
+
+    return index
+
+def lookup_date_index(index, date_key):
+    """Events for a YYYY-MM-DD key: exact and month matches, else the year's events"""
+    found = index['day'].get(date_key, []) + index['month'].get(date_key[:7], [])
+    if not found:
+        found = list(index['year'].get(date_key[:4], []))
+    return found
 
 def load_world_events():
     """Load world/national events from chronology file"""
@@ -198,7 +390,7 @@ def load_world_events():
                 })
 
     print(f"Loaded world events for {len(ongoing_by_year)} years")
-    return events_by_date, ongoing_by_year
+    return build_date_index(events_by_date), ongoing_by_year
 
 def load_chronos_events():
     """Load BMC events from comprehensive chronology"""
@@ -239,7 +431,7 @@ def load_chronos_events():
                 pass
 
     print(f"Loaded {sum(len(v) for v in events_by_date.values())} BMC events")
-    return events_by_date
+    return build_date_index(events_by_date)
 
 def load_asheville_data():
     """Load faculty/courses from Asheville collection"""
@@ -282,131 +474,420 @@ def load_asheville_data():
     print(f"Loaded Asheville data for {len(faculty_by_year)} years")
     return faculty_by_year, courses_by_year
 
-def generate_complete_archive():
-    """Generate the complete daily archive"""
-    print("=" * 60)
-    print("Generating Complete BMC Daily Archive")
-    print("=" * 60)
+def write_archive_shards(archive, shard_dir, granularity='month', dedup=False):
+    """Write daily_calendar as one JSON file per year or month plus a manifest
+    (see archive_stream.ShardWriter)"""
+    shards = ShardWriter(shard_dir, granularity, dedup)
+    for days in archive['daily_calendar'].values():
+        shards.write_year(decode_days(days))
+
+    manifest = shards.close(archive['metadata'])
+    print(f"Wrote {len(manifest['shards'])} {granularity} shards to {shard_dir}")
+    return manifest
+
+def load_archive_shard(shard_dir, date_key, manifest=None):
+    """Load only the shard holding date_key; returns {date_key: day_entry} or {}"""
+    shard_dir = Path(shard_dir)
+    if manifest is None:
+        manifest = read_shard_manifest(shard_dir)
+        if manifest is None:
+            return {}
+
+    info = manifest['shards'].get(shard_key(date_key, manifest['granularity']))
+    if not info:
+        return {}
+
+    with open(shard_dir / info['path'], 'r') as f:
+        return decode_days(json.load(f))
+
+BUILD_STATE_NAME = "bmc_archive_build_state.json"
+# Recorded in the build state; bump whenever the layout of a day entry or of
+# the archive file changes, so incremental runs start over
+ARCHIVE_FORMAT_VERSION = 1
+
+def source_paths():
+    """Input files the archive is generated from"""
+    return {
+        'people': CHRONOS2 / "BlackMountainPeople.txt",
+        'world_chronology': DATA_BMC / "Chronos" / "bmc_chronology_1933-1957.json",
+        'bmc_chronology': CHRONOS2 / "bmc_chronology_wikipedia.json",
+        'asheville': CHRONOS2 / "asheville_events.json"
+    }
 
-    # Load all data sources
+def hash_file(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_json(obj):
+    """SHA-256 of a canonical JSON encoding"""
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_sources():
+    """Load and index every input the daily calendar depends on"""
     people = parse_people_file()
     world_events, yearly_context = load_world_events()
-    bmc_events = load_chronos_events()
     asheville_faculty, asheville_courses = load_asheville_data()
 
-    # Build archive structure
-    archive = {
-        'metadata': {
-            'title': 'Black Mountain College Complete Daily Archive',
-            'version': '2.0',
-            'generated': datetime.now().isoformat(),
-            'sources': [
-                'BlackMountainPeople.txt (1299 people)',
-                'bmc_chronology_wikipedia.json (4639 events)',
-                'bmc_chronology_1933-1957.json (world events)',
-                'asheville_events.json (377 documents)',
-                'Weather: Open-Meteo historical API',
-                'Radio: Billboard charts + WWNC Asheville'
-            ],
-            'date_range': '1933-1957'
-        },
+    return {
+        'people': people,
+        'presence': build_presence_table(people),
+        'world_events': world_events,
         'yearly_context': yearly_context,
-        'daily_calendar': {}
+        'bmc_events': load_chronos_events(),
+        'asheville_faculty': asheville_faculty,
+        'asheville_courses': asheville_courses
     }
 
-    # Generate daily entries for BMC period (1933-1957)
-    from datetime import timedelta
+def year_fingerprint(year, sources):
+    """Hash of the slice of every input that feeds one year of the calendar"""
+    year_str = str(year)
+    world_events = sources['world_events']
+
+    def in_year(table):
+        return {k: v for k, v in table.items() if k.startswith(year_str)}
+
+    return hash_json({
+        'people': sources['presence']['rosters'].get(year),
+        'world_day': in_year(world_events['day']),
+        'world_month': in_year(world_events['month']),
+        'world_year': world_events['year'].get(year_str),
+        'bmc': in_year(sources['bmc_events']['day']),
+        'courses': len(sources['asheville_courses'].get(year_str, []))
+    })
+
+def build_day_entry(day, sources):
+    """Build the calendar entry for one date"""
+    presence = sources['presence']
+    world_events = sources['world_events']
+    bmc_events = sources['bmc_events']
+    asheville_courses = sources['asheville_courses']
+
+    year_str = str(day.year)
+    date_key = day.isoformat()
+    month = day.month
 
-    start_date = date(1933, 1, 1)
-    end_date = date(1957, 12, 31)
-    current = start_date
+    # Determine semester
+    if month >= 9:
+        semester = 'fall'
+    elif month >= 6:
+        semester = 'summer'
+    else:
+        semester = 'spring'
 
-    days_processed = 0
+    # Build day entry
+    day_entry = {
+        'day_of_week': DAY_NAMES[day.weekday()],
+        'semester': semester
+    }
 
-    while current <= end_date:
-        year_str = str(current.year)
-        date_key = current.strftime('%Y-%m-%d')
-        month = current.month
+    # People present this year
+    people_present = get_people_present(presence, day.year, month)
+    day_entry['people'] = get_headcounts(presence, day)
+
+    # Add sample names (not all, to save space)
+    if people_present['faculty']:
+        day_entry['people']['faculty_sample'] = [p['name'] for p in people_present['faculty'][:10]]
+    if people_present['students']:
+        day_entry['people']['students_sample'] = [p['name'] for p in people_present['students'][:10]]
+
+    # Courses (from Asheville data)
+    if year_str in asheville_courses:
+        day_entry['courses_available'] = len(asheville_courses[year_str])
+
+    # BMC Events for this date
+    if date_key in bmc_events['day']:
+        day_entry['bmc_events'] = bmc_events['day'][date_key]
+
+    # World/National events: exact date, then month (e.g. "1936-04"),
+    # then year (e.g. "1936") only if nothing more specific
+    world_today = lookup_date_index(world_events, date_key)
+
+    if world_today:
+        day_entry['world_events'] = world_today
+
+    return day_entry
+
+def has_content(day_entry):
+    """Only store days that have some content beyond basic info"""
+    return bool(
+        day_entry.get('bmc_events') or
+        day_entry.get('world_events') or
+        day_entry['people']['faculty_count'] > 0
+    )
+
+def year_event_days(year, sources):
+    """Dates in a year that carry exact-date BMC or world events"""
+    year_str = str(year)
+    days = set()
+    for table in (sources['bmc_events']['day'], sources['world_events']['day']):
+        for date_key in table:
+            if date_key.startswith(year_str):
+                try:
+                    days.add(date.fromisoformat(date_key))
+                except ValueError:
+                    pass  # e.g. "1941-02-30" never matches a calendar day
+    return days
+
+def year_log_events(year, sources):
+    """(date_key, kind, precision, event) for a year's BMC and world events, in date order.
+
+    Exact-date events sit on their day; month- and year-level events appear
+    once, on the first day of their month or year.
+    """
+    year_str = str(year)
+    entries = []
+    for kind in ('bmc', 'world'):
+        index = sources[f'{kind}_events']
+        for precision, table in index.items():
+            for key, events in table.items():
+                if not key.startswith(year_str):
+                    continue
+                date_key = {'day': key, 'month': f"{key}-01", 'year': f"{key}-01-01"}[precision]
+                try:
+                    date.fromisoformat(date_key)
+                except ValueError:
+                    continue  # e.g. "1941-02-30"
+                entries.extend((date_key, kind, precision, event) for event in events)
+    entries.sort(key=lambda entry: entry[0])
+    return entries
+
+def generate_year(year, sources):
+    """Generate the {date_key: day_entry} calendar for one year.
+
+    Only dates where an entry can change are visited: month starts (semester,
+    month-level world events), presence-interval boundaries and exact-date
+    events. Every other day repeats the entry of the segment it falls in,
+    with its own day of the week.
+    """
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    event_days = year_event_days(year, sources)
+
+    starts = {date(year, month, 1) for month in range(1, 13)}
+    for offset in sources['presence']['boundaries']:
+        boundary = ARCHIVE_START + timedelta(days=offset)
+        if first <= boundary <= last:
+            starts.add(boundary)
+    for day in event_days:
+        starts.add(day)
+        if day < last:
+            starts.add(day + timedelta(days=1))
+
+    starts = sorted(starts)
+    calendar = {}
+
+    for i, seg_start in enumerate(starts):
+        seg_end = starts[i + 1] - timedelta(days=1) if i + 1 < len(starts) else last
+
+        day_entry = build_day_entry(seg_start, sources)
+        if not has_content(day_entry):
+            continue
 
-        # Determine semester
-        if month >= 9:
-            semester = 'fall'
-        elif month >= 6:
-            semester = 'summer'
-        else:
-            semester = 'spring'
+        calendar[seg_start.isoformat()] = day_entry
+        weekday = seg_start.weekday()
+        for n in range(1, (seg_end - seg_start).days + 1):
+            day = seg_start + timedelta(days=n)
+            calendar[day.isoformat()] = {**day_entry, 'day_of_week': DAY_NAMES[(weekday + n) % 7]}
+
+    return calendar
+
+# Inputs generate_year() needs, installed once per worker process
+WORKER_SOURCE_KEYS = ['presence', 'world_events', 'bmc_events', 'asheville_courses']
+# Years submitted to the pool but not yet written, per worker; bounds memory
+YEARS_IN_FLIGHT_PER_WORKER = 2
+_worker_sources = None
+
+def _init_worker(sources):
+    """Pool initializer: keep the shared inputs as a process global.
+
+    With the fork start method initargs are inherited rather than pickled;
+    with spawn they arrive as one serialized snapshot per worker.
+    """
+    global _worker_sources
+    _worker_sources = sources
+
+def _generate_year_worker(year):
+    return generate_year(year, _worker_sources)
+
+def build_settings(shard, dedup):
+    """Everything besides the inputs that an incremental build must match:
+    output options, format version and the code that generates the archive"""
+    code_dir = Path(__file__).resolve().parent
+    return {
+        'format': ARCHIVE_FORMAT_VERSION,
+        'options': {'shard': shard, 'dedup': dedup},
+        'code': {name: hash_file(code_dir / name)
+                 for name in ('generate_complete_archive.py', 'archive_stream.py')}
+    }
 
-        # Initialize year in calendar if needed
-        if year_str not in archive['daily_calendar']:
-            archive['daily_calendar'][year_str] = {}
+def load_build_state(state_path):
+    """Read the incremental build state, or None if there is none"""
+    if not state_path.exists():
+        return None
+    with open(state_path, 'r') as f:
+        return json.load(f)
+
+def generate_complete_archive(shard=None, incremental=False, workers=1, dedup=True):
+    """Generate the complete daily archive
+
+    shard: None, 'year' or 'month' -- also write a sharded copy of the
+    daily calendar under SITE_DIR / SHARD_DIR_NAME for lazy loading. With
+    None, shards left by an earlier build are deleted so the site reads the
+    archive itself.
+
+    incremental: reuse the existing bmc_complete_archive.json and regenerate
+    only the years whose inputs (or recorded output) changed since the last
+    build, as tracked in SITE_DIR / BUILD_STATE_NAME. A build with other
+    shard/dedup options, format version or generator code starts over.
+
+    workers: generate years in a pool of this many processes. Results are
+    written in year order, so the output is identical to a serial run; at
+    most YEARS_IN_FLIGHT_PER_WORKER * workers years are pending at a time.
+
+    dedup: store each year's repeated people blocks and world events once in
+    per-year tables referenced by index (see archive_stream.encode_days).
+    """
+    print("=" * 60)
+    print("Generating Complete BMC Daily Archive")
+    print("=" * 60)
 
-        # Build day entry
-        day_entry = {
-            'day_of_week': current.strftime('%A'),
-            'semester': semester
-        }
+    output_path = SITE_DIR / "bmc_complete_archive.json"
+    state_path = SITE_DIR / BUILD_STATE_NAME
+    years = [str(y) for y in range(ARCHIVE_START.year, ARCHIVE_END.year + 1)]
+
+    input_hashes = {name: hash_file(path) for name, path in source_paths().items()}
+    settings = build_settings(shard, dedup)
+    state = load_build_state(state_path) if incremental else None
+    if state and not output_path.exists():
+        state = None
+    if state and state.get('settings') != settings:
+        # Years recorded under other options or code cannot be reused
+        print("Build options or generator changed since last build; regenerating every year")
+        state = None
+
+    if state and state.get('inputs') == input_hashes:
+        print("Inputs unchanged since last build; archive is up to date")
+        return
 
-        # People present this year
-        people_present = get_people_present(people, current.year, month)
-        day_entry['people'] = {
-            'faculty_count': len(people_present['faculty']),
-            'students_count': len(people_present['students']),
-            'staff_count': len(people_present['staff']),
-            'guests_count': len(people_present['guests'])
-        }
+    # Load all data sources
+    sources = load_sources()
+    people = sources['people']
+    yearly_context = sources['yearly_context']
+    asheville_courses = sources['asheville_courses']
+
+    fingerprints = {y: year_fingerprint(int(y), sources) for y in years}
+
+    # Years from the previous build, read back one at a time in file order
+    recorded = state.get('years', {}) if state else {}
+    previous = ArchiveReader(output_path).years() if state else iter(())
+    pending = next(previous, None)
+
+    metadata = {
+        'title': 'Black Mountain College Complete Daily Archive',
+        'version': '2.0',
+        'generated': datetime.now().isoformat(),
+        'sources': [
+            'BlackMountainPeople.txt (1299 people)',
+            'bmc_chronology_wikipedia.json (4639 events)',
+            'bmc_chronology_1933-1957.json (world events)',
+            'asheville_events.json (377 documents)',
+            'Weather: Open-Meteo historical API',
+            'Radio: Billboard charts + WWNC Asheville'
+        ],
+        'date_range': '1933-1957'
+    }
+    if dedup:
+        metadata['encoding'] = 'dedup'
+
+    # Years are independent, so those whose inputs changed can be generated
+    # ahead of time in worker processes. Only a window of them is in flight:
+    # finished years wait in memory until the writer reaches them.
+    executor = None
+    futures = {}
+    queued = iter(())
+    if workers > 1:
+        worker_sources = {key: sources[key] for key in WORKER_SOURCE_KEYS}
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(worker_sources,))
+        changed = [y for y in years if recorded.get(y, {}).get('inputs') != fingerprints[y]]
+        queued = iter(changed)
+        print(f"Generating {len(changed)} years with {workers} workers")
+
+    def submit_ahead():
+        while executor and len(futures) < YEARS_IN_FLIGHT_PER_WORKER * workers:
+            year_str = next(queued, None)
+            if year_str is None:
+                return
+            futures[year_str] = executor.submit(_generate_year_worker, int(year_str))
+
+    submit_ahead()
+
+    # Stream the archive out one year at a time so memory stays bounded
+    # by a single year of the calendar
+    print(f"Saving to {output_path}...")
+    writer = ArchiveWriter(output_path, dedup=dedup, metadata=metadata, yearly_context=yearly_context)
+    event_log = EventLogWriter(SITE_DIR / EVENT_LOG_NAME)
+    shards = ShardWriter(SITE_DIR / SHARD_DIR_NAME, shard, dedup) if shard else None
+    if not shard:
+        remove_shards(SITE_DIR / SHARD_DIR_NAME)
+    year_states = {}
+    regenerated = []
+    days_processed = 0
 
-        # Add sample names (not all, to save space)
-        if people_present['faculty']:
-            day_entry['people']['faculty_sample'] = [p['name'] for p in people_present['faculty'][:10]]
-        if people_present['students']:
-            day_entry['people']['students_sample'] = [p['name'] for p in people_present['students'][:10]]
-
-        # Courses (from Asheville data)
-        if year_str in asheville_courses:
-            day_entry['courses_available'] = len(asheville_courses[year_str])
-
-        # BMC Events for this date
-        if date_key in bmc_events:
-            day_entry['bmc_events'] = bmc_events[date_key]
-
-        # World/National events
-        world_today = []
-        for date_pattern, events in world_events.items():
-            # Exact match
-            if date_pattern == date_key:
-                world_today.extend(events)
-            # Month match (e.g., "1936-04")
-            elif date_pattern == date_key[:7]:
-                world_today.extend(events)
-            # Year match (e.g., "1936")
-            elif date_pattern == year_str and not world_today:
-                # Only add if nothing more specific
+    try:
+        with writer, event_log:
+            # Generate daily entries for BMC period (1933-1957), splicing in
+            # unchanged years from the previous build
+            for year_str in years:
+                while pending is not None and pending[0] < year_str:
+                    pending = next(previous, None)
+
+                days = None
+                if pending is not None and pending[0] == year_str:
+                    recorded_year = recorded.get(year_str, {})
+                    if (recorded_year.get('inputs') == fingerprints[year_str]
+                            and recorded_year.get('output') == hash_json(pending[1])):
+                        days = pending[1]
+
+                if year_str in futures:
+                    days = futures.pop(year_str).result()
+                    submit_ahead()
+                    regenerated.append(year_str)
+                elif days is None:
+                    days = generate_year(int(year_str), sources)
+                    regenerated.append(year_str)
+
+                writer.write_year(year_str, days)
+                for date_key, kind, precision, event in year_log_events(int(year_str), sources):
+                    event_log.add(date_key, kind, event, precision)
+                if shards:
+                    shards.write_year(days)
+
+                year_states[year_str] = {'inputs': fingerprints[year_str], 'output': hash_json(days)}
+                days_processed += len(days)
+
+            # Drain the previous build so its file is closed before replacing it
+            for _ in previous:
                 pass
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
 
-        if world_today:
-            day_entry['world_events'] = world_today
-
-        # Only store days that have some content beyond basic info
-        has_content = (
-            day_entry.get('bmc_events') or
-            day_entry.get('world_events') or
-            day_entry['people']['faculty_count'] > 0
-        )
-
-        if has_content:
-            archive['daily_calendar'][year_str][date_key] = day_entry
-            days_processed += 1
-
-        current += timedelta(days=1)
-
+    if state:
+        print(f"Incremental build: regenerated {len(regenerated)} of {len(years)} years {regenerated}")
     print(f"\nProcessed {days_processed} days with content")
 
-    # Save archive
-    output_path = SITE_DIR / "bmc_complete_archive.json"
-    print(f"Saving to {output_path}...")
+    if shards:
+        shards.close(metadata)
+        print(f"Wrote {len(shards.entries)} {shard} shards to {SITE_DIR / SHARD_DIR_NAME}")
 
-    with open(output_path, 'w') as f:
-        json.dump(archive, f, ensure_ascii=False)
+    # Record build state for the next incremental run
+    with open(state_path, 'w') as f:
+        json.dump({'inputs': input_hashes, 'settings': settings, 'years': year_states}, f, indent=2)
 
     # Also save separate files for quick loading
 
@@ -431,14 +912,22 @@ def generate_complete_archive():
     with open(SITE_DIR / "bmc_courses_by_year.json", 'w') as f:
         json.dump(courses_export, f, ensure_ascii=False, indent=2)
 
+    # Save course enrollment rosters (inverted index over student records)
+    with open(SITE_DIR / "bmc_course_rosters.json", 'w') as f:
+        json.dump(export_course_index(build_course_index(people)), f, ensure_ascii=False)
+
     # Save yearly context
     with open(SITE_DIR / "bmc_yearly_context.json", 'w') as f:
         json.dump(yearly_context, f, ensure_ascii=False, indent=2)
 
     print("\nGenerated files:")
     print(f"  - bmc_complete_archive.json")
+    print(f"  - {EVENT_LOG_NAME} ({event_log.count} events, offsets in {EVENT_LOG_NAME}.idx)")
+    if shard:
+        print(f"  - {SHARD_DIR_NAME}/manifest.json ({shard} shards)")
     print(f"  - bmc_people_index.json ({len(people_index)} people)")
     print(f"  - bmc_courses_by_year.json")
+    print(f"  - bmc_course_rosters.json")
     print(f"  - bmc_yearly_context.json")
 
     # Stats
@@ -446,4 +935,16 @@ def generate_complete_archive():
     print(f"\nTotal data size: {total_size / 1024 / 1024:.1f} MB")
 
 if __name__ == '__main__':
-    generate_complete_archive()
+    parser = argparse.ArgumentParser(description="Generate the complete BMC daily archive")
+    parser.add_argument('--shard', choices=['year', 'month'],
+                        help="also write per-year or per-month shards plus a manifest")
+    parser.add_argument('--incremental', action='store_true',
+                        help="regenerate only years whose inputs changed since the last build")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="generate years in parallel with this many processes")
+    parser.add_argument('--no-dedup', dest='dedup', action='store_false',
+                        help="write plain day entries instead of per-year shared tables")
+    args = parser.parse_args()
+
+    generate_complete_archive(shard=args.shard, incremental=args.incremental,
+                              workers=args.workers, dedup=args.dedup)
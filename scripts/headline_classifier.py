@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Multinomial naive Bayes over hashed bag-of-words headline vectors.
+
+vectorize() turns a batch of titles into a sparse term-count matrix in
+coordinate form (SparseRows: rows, indices, data): each lowercase word and
+each pair of adjacent words is hashed into one of N_FEATURES columns, so
+there is no vocabulary to build or store. Tokenizing and hashing work on
+the batch's bytes as whole arrays rather than word by word.
+NaiveBayes.fit() counts features per class with one bincount per class;
+scores() gives every row's per-class log likelihood with one gather and one
+bincount per class, so a batch of any size is classified in a handful of
+array operations.
+
+The model learns the keyword rules' categories and can be compared with
+them through confusion_matrix(); cross_predict() labels every headline with
+a model that did not see it in training. Requires NumPy.
+"""
+
+import re
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CATEGORIES = ['culture', 'national', 'international']
+
+HASH_BITS = 18
+N_FEATURES = 1 << HASH_BITS
+# Additive smoothing; 1.0 all but erases the small culture class (5% of the
+# held-out culture headlines recovered against 58% at 0.1)
+ALPHA = 0.1
+# Titles vectorized and scored at a time by classify()
+BATCH_SIZE = 100_000
+# cross_predict() trains one model per fold, each without that fold's titles
+FOLDS = 5
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Word hashes are polynomials in HASH_BASE over the word's bytes, mod 2**64
+# (uint64 arithmetic wraps); a word pair hashes as first * PAIR_MULT +
+# second, and MIX spreads a hash over the top bits, which pick the column
+HASH_BASE = 0x100000001B3
+PAIR_MULT = 0xC2B2AE3D27D4EB4F
+MIX = 0x9E3779B97F4A7C15
+
+SparseRows = namedtuple('SparseRows', ['rows', 'indices', 'data', 'n_rows', 'n_features'])
+
+
+def _powers(count):
+    power, powers = 1, []
+    for _ in range(count):
+        powers.append(power)
+        power = power * HASH_BASE % (1 << 64)
+    return np.array(powers, dtype=np.uint64)
+
+
+def vectorize(titles, n_features=N_FEATURES):
+    """Hashed term counts for a list of titles, as a sparse matrix in coordinate form.
+
+    Words are the runs of a-z and 0-9 in the lowercased title (TOKEN_RE);
+    each word and each pair of adjacent words adds 1 at (title, column).
+    The whole batch is tokenized and hashed with array operations on its
+    UTF-8 bytes. n_features must be a power of two.
+    """
+    if np is None:
+        raise RuntimeError("headline_classifier needs NumPy")
+    bits = n_features.bit_length() - 1
+    data = np.frombuffer('\0'.join(titles).lower().encode('utf-8'), dtype=np.uint8)
+    is_word = ((data >= ord('a')) & (data <= ord('z'))) | ((data >= ord('0')) & (data <= ord('9')))
+    edges = np.diff(is_word.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    rows = np.searchsorted(np.flatnonzero(data == 0), starts)
+
+    if len(starts):
+        # Each byte times HASH_BASE ** (its position within the word)
+        word_starts = np.cumsum(lengths) - lengths
+        positions = np.arange(int(lengths.sum())) - np.repeat(word_starts, lengths)
+        terms = data[is_word].astype(np.uint64) * _powers(int(lengths.max()))[positions]
+        hashes = np.add.reduceat(terms, word_starts)
+    else:
+        hashes = np.zeros(0, dtype=np.uint64)
+
+    same_title = rows[1:] == rows[:-1]
+    pairs = hashes[:-1][same_title] * np.uint64(PAIR_MULT) + hashes[1:][same_title]
+    hashes = np.concatenate((hashes, pairs))
+    rows = np.concatenate((rows, rows[1:][same_title]))
+    indices = ((hashes * np.uint64(MIX)) >> np.uint64(64 - bits)).astype(np.int32)
+    # Repeated terms stay as separate entries; every operation below sums them
+    return SparseRows(rows, indices, np.ones(len(indices), dtype=np.float32), len(titles), n_features)
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes over SparseRows; labels are class indices."""
+
+    def __init__(self, classes=CATEGORIES, alpha=ALPHA):
+        self.classes = list(classes)
+        self.alpha = alpha
+        self.class_log_prior = None
+        self.feature_log_prob = None
+
+    def fit(self, X, y):
+        y = np.asarray(y)
+        entry_class = y[X.rows]
+        # (features, classes)
+        counts = np.stack([
+            np.bincount(X.indices[entry_class == c], weights=X.data[entry_class == c], minlength=X.n_features)
+            for c in range(len(self.classes))
+        ], axis=1) + self.alpha
+        self.feature_log_prob = np.log(counts) - np.log(counts.sum(axis=0))
+        class_counts = np.bincount(y, minlength=len(self.classes))
+        self.class_log_prior = np.log(class_counts) - np.log(class_counts.sum())
+        return self
+
+    def scores(self, X):
+        """(rows, classes) joint log likelihoods"""
+        return np.stack([
+            np.bincount(X.rows, weights=self.feature_log_prob[X.indices, c] * X.data, minlength=X.n_rows)
+            for c in range(len(self.classes))
+        ], axis=1) + self.class_log_prior
+
+    def predict(self, X):
+        """Class index per row"""
+        return self.scores(X).argmax(axis=1)
+
+
+def train(titles, labels, classes=CATEGORIES):
+    return NaiveBayes(classes).fit(vectorize(titles), labels)
+
+
+def classify(model, titles, batch_size=BATCH_SIZE):
+    """Category name per title"""
+    predicted = []
+    for start in range(0, len(titles), batch_size):
+        codes = model.predict(vectorize(titles[start:start + batch_size]))
+        predicted.extend(model.classes[code] for code in codes)
+    return predicted
+
+
+def cross_predict(titles, labels, folds=FOLDS, classes=CATEGORIES):
+    """Category name per title, each from a model trained without it.
+
+    Title i falls in fold i % folds and is classified by a model fitted on
+    the other folds, so the predictions compared with labels give held-out
+    agreement, and labels never feed back into their own prediction.
+    """
+    labels = np.asarray(labels)
+    fold_of = np.arange(len(titles)) % folds
+    predicted = [None] * len(titles)
+    for fold in range(folds):
+        held_out = np.flatnonzero(fold_of == fold).tolist()
+        if not held_out:
+            continue
+        rest = np.flatnonzero(fold_of != fold)
+        model = train([titles[i] for i in rest.tolist()], labels[rest], classes)
+        for i, name in zip(held_out, classify(model, [titles[i] for i in held_out])):
+            predicted[i] = name
+    return predicted
+
+
+def confusion_matrix(expected, predicted, classes=CATEGORIES):
+    """matrix[i][j]: headlines labelled classes[i] by expected and classes[j] by predicted"""
+    position = {name: i for i, name in enumerate(classes)}
+    matrix = [[0] * len(classes) for _ in classes]
+    for a, b in zip(expected, predicted):
+        matrix[position[a]][position[b]] += 1
+    return matrix
+
+
+def print_confusion(matrix, classes=CATEGORIES, rows_label="rules", columns_label="classifier"):
+    width = max(len(name) for name in classes) + 2
+    corner = f"{rows_label} \\ {columns_label}"
+    print(f"  {corner:<{width + 4}}" + ''.join(f"{name:>{width}}" for name in classes))
+    for name, row in zip(classes, matrix):
+        print(f"  {name:<{width + 4}}" + ''.join(f"{count:>{width},}" for count in row))
+    total = sum(map(sum, matrix))
+    agree = sum(matrix[i][i] for i in range(len(classes)))
+    print(f"  Agreement: {agree:,}/{total:,} ({agree / total:.1%})" if total else "  No headlines")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate clustering of NY Times headlines with MinHash and LSH.
+
+Each headline is case-folded, stripped to letters and digits, and cut into
+overlapping character shingles. A MinHash signature of NUM_PERM values
+estimates the Jaccard similarity of two shingle sets by the fraction of
+equal entries. The signatures are split into BANDS bands of ROWS values;
+headlines that share a band within WINDOW_DAYS of each other become
+candidate pairs, and a candidate counts as a duplicate when its estimated
+similarity reaches THRESHOLD. Duplicates are merged transitively, so no
+pair of headlines is compared unless LSH brings them together.
+
+cluster_ids(dates, titles) returns one cluster ID per headline: the
+position of the cluster's first headline in the input, so a headline
+without duplicates has its own position as its ID.
+"""
+
+import random
+import re
+from bisect import bisect_left
+
+from bmc_dates import day_number
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SHINGLE_SIZE = 5
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# With 8 bands of 4 rows, pairs are candidates from about (1/8) ** (1/4) = 0.59 similarity
+THRESHOLD = 0.5
+WINDOW_DAYS = 2
+
+# Hash family h(x) = (a * x + b) mod P over 31-bit shingle hashes; a * x fits in 64 bits
+PRIME = (1 << 31) - 1
+SEED = 1933
+
+# Headlines hashed per NumPy block, to bound the (NUM_PERM x shingles) matrix
+SIGNATURE_BLOCK = 2048
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def fold(title):
+    """Lowercase letters and digits, runs of anything else as one space"""
+    text = NON_ALNUM_RE.sub(' ', title.lower()).strip()
+    return text.ljust(SHINGLE_SIZE) if text else ''
+
+
+def shingles(text):
+    """The SHINGLE_SIZE-character windows of a folded title, as integers mod PRIME
+
+    A window's integer is its ASCII bytes read big-endian, so equal windows
+    hash equal in every process (unlike hash(), which is salted).
+    """
+    data = text.encode('ascii')
+    return {int.from_bytes(data[i:i + SHINGLE_SIZE], 'big') % PRIME
+            for i in range(len(data) - SHINGLE_SIZE + 1)}
+
+
+class MinHasher:
+    """NUM_PERM universal hash functions, fixed by seed."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=SEED):
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, PRIME) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, PRIME) for _ in range(num_perm)]
+
+    def signature(self, text):
+        """MinHash signature of one folded title (None if it is empty)"""
+        if not text:
+            return None
+        hashes = shingles(text)
+        return tuple(min((a * x + b) % PRIME for x in hashes) for a, b in zip(self.a, self.b))
+
+    def signatures(self, texts):
+        """Signatures for many folded titles; vectorized per block when NumPy is available"""
+        if np is None:
+            return [self.signature(text) for text in texts]
+
+        a = np.array(self.a, dtype=np.uint64)[:, None]
+        b = np.array(self.b, dtype=np.uint64)[:, None]
+        result = []
+        for start in range(0, len(texts), SIGNATURE_BLOCK):
+            block = texts[start:start + SIGNATURE_BLOCK]
+            filled = [text for text in block if text]
+            if not filled:
+                result.extend(None for _ in block)
+                continue
+            # Rolling window values over the concatenated block; only the
+            # windows that lie inside one title are used. Repeated shingles
+            # do not change a minimum, so they are not removed.
+            data = np.frombuffer(''.join(filled).encode('ascii'), dtype=np.uint8).astype(np.uint64)
+            windows = np.zeros(len(data) - SHINGLE_SIZE + 1, dtype=np.uint64)
+            for k in range(SHINGLE_SIZE):
+                windows = (windows << np.uint64(8)) | data[k:len(data) - SHINGLE_SIZE + 1 + k]
+            lengths = np.array([len(text) for text in filled])
+            counts = lengths - SHINGLE_SIZE + 1
+            text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            positions = np.repeat(text_starts - offsets, counts) + np.arange(counts.sum())
+            x = windows[positions] % np.uint64(PRIME)
+            mins = np.minimum.reduceat((a * x + b) % np.uint64(PRIME), offsets, axis=1).T.tolist()
+            rows = iter(mins)
+            result.extend(tuple(next(rows)) if text else None for text in block)
+        return result
+
+
+def _find(parent, i):
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+
+def cluster_ids(dates, titles, window_days=WINDOW_DAYS, threshold=THRESHOLD):
+    """Cluster ID per headline for parallel lists of ISO dates and titles.
+
+    Headlines with unparseable dates or no letters or digits stay alone.
+    """
+    n = len(titles)
+    parent = list(range(n))
+    days = [day_number(d) if isinstance(d, str) and len(d) == 10 else None for d in dates]
+    signatures = MinHasher().signatures([fold(title or '') for title in titles])
+
+    order = sorted((i for i in range(n) if days[i] is not None and signatures[i] is not None),
+                   key=lambda i: days[i])
+    # (band, band values) -> [(day, position)] in date order; entries older
+    # than the window are dropped when the bucket is next visited
+    buckets = {}
+    for i in order:
+        day, signature = days[i], signatures[i]
+        checked = set()
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS:(band + 1) * ROWS])
+            bucket = buckets.setdefault(key, [])
+            stale = bisect_left(bucket, (day - window_days, -1))
+            if stale:
+                del bucket[:stale]
+            for _, j in bucket:
+                if j in checked:
+                    continue
+                checked.add(j)
+                other = signatures[j]
+                same = sum(1 for x, y in zip(signature, other) if x == y)
+                if same >= threshold * len(signature):
+                    ri, rj = _find(parent, i), _find(parent, j)
+                    if ri != rj:
+                        # The lower position stays the root, and so the cluster ID
+                        parent[max(ri, rj)] = min(ri, rj)
+            bucket.append((day, i))
+
+    return [_find(parent, i) for i in range(n)]
+
+
+def cluster_sizes(ids):
+    """{cluster ID: member count} for clusters of two or more headlines"""
+    sizes = {}
+    for cluster in ids:
+        sizes[cluster] = sizes.get(cluster, 0) + 1
+    return {cluster: size for cluster, size in sizes.items() if size > 1}
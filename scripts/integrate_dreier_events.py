@@ -5,32 +5,34 @@ Integrate Dreier Collection events into the main BMC archive.
 
 import json
 import re
+from collections import defaultdict
 from datetime import datetime
 
+from archive_stream import ArchiveRewriter
+from bmc_dates import from_fields
+
 DREIER_FILE = "../dreier_events.json"
 ARCHIVE_FILE = "../bmc_complete_archive.json"
 OUTPUT_FILE = "../bmc_complete_archive.json"
 
 def date_to_key(date_info):
-    """Convert date info to YYYY-MM-DD key"""
+    """Convert date info to YYYY-MM-DD key (start of the date's interval)"""
     if not date_info:
         return None
 
-    date_type = date_info.get('type', '')
-
-    if date_type == 'exact':
-        return f"{date_info['year']}-{date_info['month']:02d}-{date_info['day']:02d}"
-    elif date_type == 'month':
-        return f"{date_info['year']}-{date_info['month']:02d}-01"
-    elif date_type == 'year':
-        return f"{date_info['year']}-01-01"
-    elif date_type == 'academic_year':
-        # Use start of academic year (September 1)
-        return f"{date_info['start_year']}-09-01"
-    elif date_type == 'circa':
-        return f"{date_info['year']}-01-01"
-    else:
-        return None
+    # Spans of exact dates carry their first day
+    if date_info.get('start_date'):
+        return date_info['start_date']
+
+    record = from_fields(
+        date_info.get('type', ''),
+        year=date_info.get('year'),
+        month=date_info.get('month'),
+        day=date_info.get('day'),
+        start_year=date_info.get('start_year'),
+        end_year=date_info.get('end_year')
+    )
+    return record.start_day if record else None
 
 
 def create_bmc_event(dreier_event):
@@ -63,24 +65,17 @@ def main():
     with open(DREIER_FILE, 'r', encoding='utf-8') as f:
         dreier_data = json.load(f)
 
-    with open(ARCHIVE_FILE, 'r', encoding='utf-8') as f:
-        archive = json.load(f)
-
     dreier_events = dreier_data.get('events', [])
     print(f"  Dreier events: {len(dreier_events)}")
-    print(f"  Archive years: {len(archive.get('daily_calendar', {}))}")
-
-    # Ensure daily_calendar structure exists
-    if 'daily_calendar' not in archive:
-        archive['daily_calendar'] = {}
 
     # Track statistics
     added = 0
     skipped = 0
     by_year = {}
 
-    # Process each Dreier event
+    # Group events by year so the archive can be streamed one year at a time
     print("\nProcessing events...")
+    events_by_year = defaultdict(list)
     for dreier_event in dreier_events:
         date_info = dreier_event.get('date', {})
         date_key = date_to_key(date_info)
@@ -89,35 +84,47 @@ def main():
             skipped += 1
             continue
 
-        year = date_key[:4]
-
-        # Ensure year and date structures exist
-        if year not in archive['daily_calendar']:
-            archive['daily_calendar'][year] = {}
-
-        if date_key not in archive['daily_calendar'][year]:
-            archive['daily_calendar'][year][date_key] = {
-                'bmc_events': [],
-                'world_events': []
-            }
-
-        # Ensure bmc_events list exists
-        if 'bmc_events' not in archive['daily_calendar'][year][date_key]:
-            archive['daily_calendar'][year][date_key]['bmc_events'] = []
-
-        # Create and add the event
+        # Create the event
         bmc_event = create_bmc_event(dreier_event)
-        archive['daily_calendar'][year][date_key]['bmc_events'].append(bmc_event)
-
-        added += 1
-        by_year[year] = by_year.get(year, 0) + 1
-
+        events_by_year[date_key[:4]].append((date_key, bmc_event))
+
+    def add_events(year, days):
+        nonlocal added
+        for date_key, bmc_event in events_by_year.pop(year, []):
+            # Ensure date structure exists
+            if date_key not in days:
+                days[date_key] = {
+                    'bmc_events': [],
+                    'world_events': []
+                }
+
+            # Ensure bmc_events list exists
+            if 'bmc_events' not in days[date_key]:
+                days[date_key]['bmc_events'] = []
+
+            days[date_key]['bmc_events'].append(bmc_event)
+
+            added += 1
+            by_year[year] = by_year.get(year, 0) + 1
+
+    rewriter = ArchiveRewriter(ARCHIVE_FILE, OUTPUT_FILE)
+    archive_years = 0
+    for year, days in rewriter.years():
+        add_events(year, days)
+        archive_years += 1
+
+    # Years that were not in the archive yet
+    for year in sorted(events_by_year):
+        days = {}
+        add_events(year, days)
+        rewriter.add_year(year, days)
+
+    print(f"  Archive years: {archive_years}")
     print(f"  Events added: {added}")
     print(f"  Events skipped (no date): {skipped}")
 
     # Update metadata
-    archive['metadata'] = archive.get('metadata', {})
-    archive['metadata']['dreier_integration'] = {
+    rewriter.metadata['dreier_integration'] = {
         'integrated_at': datetime.now().isoformat(),
         'events_added': added,
         'source': 'Theodore Dreier Sr., Black Mountain College Documents Collection',
@@ -125,8 +132,7 @@ def main():
     }
 
     # Save updated archive
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(archive, f, indent=2, ensure_ascii=False)
+    rewriter.close()
 
     print(f"\n✓ Archive updated: {OUTPUT_FILE}")
 
@@ -6,8 +6,12 @@ Add proper ISO 690 citations.
 
 import json
 import re
+from collections import defaultdict
 from datetime import datetime
 
+from archive_stream import ArchiveRewriter
+from bmc_dates import from_fields
+
 DUBERMAN_FILE = "../duberman_extracted.json"
 ARCHIVE_FILE = "../bmc_complete_archive.json"
 OUTPUT_FILE = "../bmc_complete_archive.json"
@@ -15,49 +19,27 @@ OUTPUT_FILE = "../bmc_complete_archive.json"
 # ISO 690 citation format
 CITATION_BASE = "DUBERMAN, Martin. Black Mountain: An Exploration in Community. New York: E.P. Dutton, 1972."
 
-# Month name to number
-MONTHS = {
-    'January': 1, 'February': 2, 'March': 3, 'April': 4,
-    'May': 5, 'June': 6, 'July': 7, 'August': 8,
-    'September': 9, 'October': 10, 'November': 11, 'December': 12
-}
-
-# Season to month approximation
-SEASONS = {
-    'spring': 3,   # March
-    'summer': 6,   # June
-    'fall': 9,     # September
-    'winter': 12   # December
-}
-
 
 def date_to_key(date_info):
-    """Convert date info to YYYY-MM-DD key"""
+    """Convert date info to YYYY-MM-DD key (start of the date's interval)"""
     if not date_info:
         return None
 
     date_type = date_info.get('type', '')
-
-    if date_type == 'exact':
-        month_num = MONTHS.get(date_info.get('month', ''), 1)
-        return f"{date_info['year']}-{month_num:02d}-{date_info.get('day', 1):02d}"
-    elif date_type == 'month':
-        month_num = MONTHS.get(date_info.get('month', ''), 1)
-        return f"{date_info['year']}-{month_num:02d}-01"
-    elif date_type == 'season':
-        raw = date_info.get('raw', '').lower()
-        month = 1
-        for season, m in SEASONS.items():
-            if season in raw:
-                month = m
-                break
-        return f"{date_info['year']}-{month:02d}-01"
-    elif date_type == 'range':
-        # Use start year, September 1 (academic year start)
-        return f"{date_info['start_year']}-09-01"
-    else:
+    if date_type not in ('exact', 'month', 'season', 'range'):
         return None
 
+    record = from_fields(
+        date_type,
+        year=date_info.get('year'),
+        month=date_info.get('month'),
+        day=date_info.get('day'),
+        start_year=date_info.get('start_year'),
+        end_year=date_info.get('end_year'),
+        raw=date_info.get('raw')
+    )
+    return record.start_day if record else None
+
 
 def create_bmc_event(duberman_event):
     """Convert Duberman event to BMC archive event format"""
@@ -90,24 +72,17 @@ def main():
     with open(DUBERMAN_FILE, 'r', encoding='utf-8') as f:
         duberman_data = json.load(f)
 
-    with open(ARCHIVE_FILE, 'r', encoding='utf-8') as f:
-        archive = json.load(f)
-
     duberman_events = duberman_data.get('events', [])
     print(f"  Duberman events: {len(duberman_events)}")
-    print(f"  Archive years: {len(archive.get('daily_calendar', {}))}")
-
-    # Ensure daily_calendar structure exists
-    if 'daily_calendar' not in archive:
-        archive['daily_calendar'] = {}
 
     # Track statistics
     added = 0
     skipped = 0
     by_year = {}
 
-    # Process each Duberman event
+    # Group events by year so the archive can be streamed one year at a time
     print("\nProcessing events...")
+    events_by_year = defaultdict(list)
     for duberman_event in duberman_events:
         dates = duberman_event.get('dates', [])
         if not dates:
@@ -122,35 +97,47 @@ def main():
             skipped += 1
             continue
 
-        year = date_key[:4]
-
-        # Ensure year and date structures exist
-        if year not in archive['daily_calendar']:
-            archive['daily_calendar'][year] = {}
-
-        if date_key not in archive['daily_calendar'][year]:
-            archive['daily_calendar'][year][date_key] = {
-                'bmc_events': [],
-                'world_events': []
-            }
-
-        # Ensure bmc_events list exists
-        if 'bmc_events' not in archive['daily_calendar'][year][date_key]:
-            archive['daily_calendar'][year][date_key]['bmc_events'] = []
-
-        # Create and add the event
+        # Create the event
         bmc_event = create_bmc_event(duberman_event)
-        archive['daily_calendar'][year][date_key]['bmc_events'].append(bmc_event)
-
-        added += 1
-        by_year[year] = by_year.get(year, 0) + 1
-
+        events_by_year[date_key[:4]].append((date_key, bmc_event))
+
+    def add_events(year, days):
+        nonlocal added
+        for date_key, bmc_event in events_by_year.pop(year, []):
+            # Ensure date structure exists
+            if date_key not in days:
+                days[date_key] = {
+                    'bmc_events': [],
+                    'world_events': []
+                }
+
+            # Ensure bmc_events list exists
+            if 'bmc_events' not in days[date_key]:
+                days[date_key]['bmc_events'] = []
+
+            days[date_key]['bmc_events'].append(bmc_event)
+
+            added += 1
+            by_year[year] = by_year.get(year, 0) + 1
+
+    rewriter = ArchiveRewriter(ARCHIVE_FILE, OUTPUT_FILE)
+    archive_years = 0
+    for year, days in rewriter.years():
+        add_events(year, days)
+        archive_years += 1
+
+    # Years that were not in the archive yet
+    for year in sorted(events_by_year):
+        days = {}
+        add_events(year, days)
+        rewriter.add_year(year, days)
+
+    print(f"  Archive years: {archive_years}")
     print(f"  Events added: {added}")
     print(f"  Events skipped (no date): {skipped}")
 
     # Update metadata
-    archive['metadata'] = archive.get('metadata', {})
-    archive['metadata']['duberman_integration'] = {
+    rewriter.metadata['duberman_integration'] = {
         'integrated_at': datetime.now().isoformat(),
         'events_added': added,
         'source': CITATION_BASE,
@@ -158,8 +145,7 @@ def main():
     }
 
     # Save updated archive
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(archive, f, indent=2, ensure_ascii=False)
+    rewriter.close()
 
     print(f"\n✓ Archive updated: {OUTPUT_FILE}")
 
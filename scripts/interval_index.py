@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Sorted interval index for overlap queries over day ranges.
+
+Intervals are inclusive [start, end] integer pairs (e.g. bmc_dates day
+offsets). They are kept in start-sorted arrays and laid out as an implicit
+balanced binary tree over array positions: the node at position i on level k
+stores in max_end the largest end in its subtree. An overlap query walks the
+tree, skipping subtrees whose max_end falls before the query, so it costs
+O(log n + k) for k hits. The arrays are plain lists and serialize to JSON
+as they are, so consumers can query without rebuilding.
+"""
+
+# Subtrees at or below this level are scanned linearly
+LINEAR_SCAN_LEVEL = 3
+
+
+class IntervalIndex:
+    """Overlap queries over inclusive [start, end] intervals.
+
+    IntervalIndex(starts, ends) sorts the intervals by (start, end);
+    `order[i]` is the input position of the interval at sorted position i.
+    Queries return sorted positions.
+    """
+
+    def __init__(self, starts, ends):
+        starts = [int(s) for s in starts]
+        ends = [int(e) for e in ends]
+        self.order = sorted(range(len(starts)), key=lambda i: (starts[i], ends[i]))
+        self.start = [starts[i] for i in self.order]
+        self.end = [ends[i] for i in self.order]
+        self.max_end = list(self.end)
+        self.max_level = self._augment()
+
+    def __len__(self):
+        return len(self.start)
+
+    def _augment(self):
+        """Fill max_end bottom-up; returns the root level"""
+        n = len(self.start)
+        if n == 0:
+            return -1
+        max_end = self.max_end
+        last_i = (n - 1) & ~1
+        last = max_end[last_i]
+        k = 1
+        while (1 << k) <= n:
+            x = 1 << (k - 1)
+            for i in range((x << 1) - 1, n, x << 2):
+                right = max_end[i + x] if i + x < n else last
+                max_end[i] = max(max_end[i], max_end[i - x], right)
+            last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+            if last_i < n and max_end[last_i] > last:
+                last = max_end[last_i]
+            k += 1
+        return k - 1
+
+    def overlapping(self, lo, hi=None):
+        """Sorted positions of intervals that overlap [lo, hi] (hi defaults to lo)"""
+        hi = lo if hi is None else hi
+        n = len(self.start)
+        start, end, max_end = self.start, self.end, self.max_end
+        hits = []
+        if n == 0:
+            return hits
+
+        stack = [(self.max_level, (1 << self.max_level) - 1, False)]
+        while stack:
+            k, x, left_done = stack.pop()
+            if k <= LINEAR_SCAN_LEVEL:
+                i0 = x >> k << k
+                for i in range(i0, min(i0 + (1 << (k + 1)) - 1, n)):
+                    if start[i] > hi:
+                        break
+                    if end[i] >= lo:
+                        hits.append(i)
+            elif not left_done:
+                stack.append((k, x, True))
+                y = x - (1 << (k - 1))
+                # A left child past the end of the array still has real nodes below it
+                if y >= n or max_end[y] >= lo:
+                    stack.append((k - 1, y, False))
+            elif x < n and start[x] <= hi:
+                if end[x] >= lo:
+                    hits.append(x)
+                stack.append((k - 1, x + (1 << (k - 1)), False))
+
+        hits.sort()
+        return hits
+
+    def to_dict(self):
+        """Arrays in sorted order, for writing next to the sorted records"""
+        return {'start': self.start, 'end': self.end, 'max_end': self.max_end, 'max_level': self.max_level}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild from to_dict() output without re-sorting"""
+        index = cls.__new__(cls)
+        index.start, index.end = list(data['start']), list(data['end'])
+        index.max_end, index.max_level = list(data['max_end']), data['max_level']
+        index.order = list(range(len(index.start)))
+        return index
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick multi-keyword matcher.
+
+KeywordAutomaton compiles labelled keyword lists into a single automaton
+once; count() then scans a text in one pass and reports, per label, how many
+distinct keywords occur in it (the same score as a `kw in text` test per
+keyword). With word_boundaries, a keyword only counts where it is not part
+of a longer word, so "art" no longer matches inside "party".
+"""
+
+from collections import deque
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over {label: [keyword, ...]}.
+
+    Keywords are matched case-sensitively; lowercase both the keywords and
+    the text for case-insensitive matching.
+    """
+
+    def __init__(self, keywords_by_label, word_boundaries=False):
+        self.labels = list(keywords_by_label)
+        self.word_boundaries = word_boundaries
+
+        # Keyword table: one entry per distinct keyword, with its labels
+        self.keywords = []
+        self.keyword_labels = []
+        ids = {}
+        for label, keywords in keywords_by_label.items():
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                if keyword not in ids:
+                    ids[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+                    self.keyword_labels.append([])
+                self.keyword_labels[ids[keyword]].append(label)
+
+        # Trie: goto[state] maps a character to the child state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # keyword ids ending at each state
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append(keyword_id)
+
+        # Failure links, breadth first; outputs inherit along them. The goto
+        # and failure functions are then folded into one transition table,
+        # so scanning takes exactly one lookup per character.
+        self.delta = [dict(self.goto[0])]
+        self.delta.extend({} for _ in range(len(self.goto) - 1))
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            f = self.fail[state]
+            self.delta[state] = {**self.delta[f], **self.goto[state]}
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                self.fail[nxt] = self.delta[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+        # Whether each keyword needs a boundary check at its start / end
+        self.check_start = [_is_word_char(k[0]) for k in self.keywords]
+        self.check_end = [_is_word_char(k[-1]) for k in self.keywords]
+
+    def matches(self, text):
+        """Ids of the distinct keywords found in text"""
+        delta, output = self.delta, self.output
+        found = set()
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if output[state]:
+                if self.word_boundaries:
+                    for keyword_id in output[state]:
+                        if keyword_id not in found and self._at_boundaries(text, i, keyword_id):
+                            found.add(keyword_id)
+                else:
+                    found.update(output[state])
+        return found
+
+    def _at_boundaries(self, text, end, keyword_id):
+        start = end - len(self.keywords[keyword_id]) + 1
+        if self.check_start[keyword_id] and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if self.check_end[keyword_id] and end + 1 < len(text) and _is_word_char(text[end + 1]):
+            return False
+        return True
+
+    def count(self, text):
+        """{label: number of distinct keywords of that label found in text}"""
+        counts = dict.fromkeys(self.labels, 0)
+        for keyword_id in self.matches(text):
+            for label in self.keyword_labels[keyword_id]:
+                counts[label] += 1
+        return counts
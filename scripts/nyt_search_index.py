@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+BM25 full-text index over the categorized NY Times headlines.
+
+`build` reads nyt_culture.json, nyt_national.json and nyt_international.json
+and writes nyt_search_index.json.gz: tokenized titles as postings lists
+(doc ID gaps plus term frequencies), per-document lengths and the BM25
+corpus statistics. Doc IDs are assigned in date order, so a date range is a
+contiguous run of IDs and every postings list is date-sorted: a query
+bisects each list to the range instead of scoring the whole corpus.
+
+    python nyt_search_index.py build
+    python nyt_search_index.py search "black mountain college" --from 1933 --to 1940-06 -k 5
+
+From Python, search(query, date_from, date_to, category, k) loads the
+index once and returns ranked hits.
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate
+
+from bmc_dates import day_number, format_days, normalize
+
+CATEGORIES = ['culture', 'national', 'international']
+INDEX_PATH = 'nyt_search_index.json.gz'
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens; "U.N." gives ['u', 'n']"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class HeadlineIndex:
+    """Inverted index with BM25 ranking over date-sorted headlines.
+
+    Postings are stored as doc ID gaps and decoded per term on first use.
+    """
+
+    def __init__(self, data):
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"unsupported index version: {data.get('version')}")
+        self.data = data
+        self.categories = data['categories']
+        self.k1, self.b = data['k1'], data['b']
+        docs = data['docs']
+        self.days = list(accumulate(docs['day_gaps']))
+        self.category = docs['category']
+        self.length = docs['length']
+        self.title = docs['title']
+        self.url = docs['url']
+        self.avg_length = data['avg_length']
+        self.postings = data['postings']
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self.days)
+
+    @classmethod
+    def build(cls, headlines_by_category):
+        """Index {category: [{'date', 'title', 'url', ...}]} as written by categorize_nyt.
+
+        Headlines without a full YYYY-MM-DD date are left out.
+        """
+        categories = list(headlines_by_category)
+        docs = [(day_number(h['date']), code, n, h)
+                for code, category in enumerate(categories)
+                for n, h in enumerate(headlines_by_category[category])
+                if isinstance(h.get('date'), str) and len(h['date']) == 10]
+        docs.sort(key=lambda doc: doc[:3])
+
+        postings = {}
+        lengths = []
+        last_doc = {}
+        for doc_id, (_, _, _, h) in enumerate(docs):
+            tokens = tokenize(h['title'])
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                gaps, tfs = postings.setdefault(term, ([], []))
+                gaps.append(doc_id - last_doc.get(term, 0))
+                tfs.append(tf)
+                last_doc[term] = doc_id
+
+        days = [doc[0] for doc in docs]
+        return cls({
+            'version': INDEX_VERSION,
+            'categories': categories,
+            'k1': K1,
+            'b': B,
+            'avg_length': sum(lengths) / len(lengths) if lengths else 0.0,
+            'docs': {
+                'day_gaps': [day - prev for day, prev in zip(days, [0] + days[:-1])],
+                'category': [doc[1] for doc in docs],
+                'length': lengths,
+                'title': [doc[3]['title'] for doc in docs],
+                'url': [doc[3]['url'] for doc in docs],
+            },
+            'postings': {term: [gaps, tfs] for term, (gaps, tfs) in postings.items()},
+        })
+
+    def save(self, path):
+        text = json.dumps(self.data, ensure_ascii=False, separators=(',', ':'))
+        with gzip.open(str(path) + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(str(path) + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _term(self, term):
+        """(doc IDs, term frequencies) for a term; empty lists if absent"""
+        if term not in self._decoded:
+            gaps, tfs = self.postings.get(term, ([], []))
+            self._decoded[term] = (list(accumulate(gaps)), tfs)
+        return self._decoded[term]
+
+    def doc_range(self, date_from=None, date_to=None):
+        """Doc IDs [lo, hi) dated within [date_from, date_to] (day offsets)"""
+        lo = 0 if date_from is None else bisect_left(self.days, date_from)
+        hi = len(self.days) if date_to is None else bisect_right(self.days, date_to)
+        return lo, hi
+
+    def search(self, query, date_from=None, date_to=None, category=None, k=10):
+        """Top k headlines for query by BM25, newest first among equal scores.
+
+        date_from and date_to are anything bmc_dates.normalize() reads
+        ('1948', 'June 1948', '1948-06-15', ...); the range runs from the
+        start of date_from to the end of date_to. IDF uses the whole corpus,
+        so scores do not depend on the filters.
+        """
+        first = _bound(date_from, 'start_day')
+        last = _bound(date_to, 'end_day')
+        code = None
+        if category is not None:
+            if category not in self.categories:
+                raise ValueError(f"unknown category {category!r}; expected one of {self.categories}")
+            code = self.categories.index(category)
+
+        lo, hi = self.doc_range(first, last)
+        n = len(self.days)
+        k1, b, avg_length = self.k1, self.b, self.avg_length
+        length, doc_category = self.length, self.category
+
+        scores = {}
+        for term in set(tokenize(query)):
+            doc_ids, tfs = self._term(term)
+            if not doc_ids:
+                continue
+            idf = math.log(1 + (n - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            # Date-range pruning: only the slice of the postings inside [lo, hi)
+            for i in range(bisect_left(doc_ids, lo), bisect_left(doc_ids, hi)):
+                doc_id = doc_ids[i]
+                if code is not None and doc_category[doc_id] != code:
+                    continue
+                tf = tfs[i]
+                norm = k1 * (1 - b + b * length[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        dates = format_days([self.days[doc_id] for doc_id, _ in top])
+        return [{
+            'score': round(score, 4),
+            'date': date_key,
+            'category': self.categories[doc_category[doc_id]],
+            'title': self.title[doc_id],
+            'url': self.url[doc_id]
+        } for (doc_id, score), date_key in zip(top, dates)]
+
+
+def _bound(value, field):
+    """Day offset for the start or end of a query date; None passes through"""
+    if value is None:
+        return None
+    record = normalize(str(value))
+    if record is None:
+        raise ValueError(f"unrecognized date: {value!r}")
+    return day_number(getattr(record, field))
+
+
+def build_index(index_path=INDEX_PATH):
+    headlines_by_category = {}
+    for category in CATEGORIES:
+        with open(f'nyt_{category}.json', 'r') as f:
+            headlines_by_category[category] = json.load(f)
+    index = HeadlineIndex.build(headlines_by_category)
+    index.save(index_path)
+    return index
+
+
+_index = None
+
+def search(query, date_from=None, date_to=None, category=None, k=10, index_path=INDEX_PATH):
+    """Ranked headlines from the saved index, loaded on first use."""
+    global _index
+    if _index is None:
+        _index = HeadlineIndex.load(index_path)
+    return _index.search(query, date_from, date_to, category, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 search over NY Times headlines")
+    parser.add_argument('--index', default=INDEX_PATH, help="index file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help="index the nyt_<category>.json files")
+    query = commands.add_parser('search', help="ranked query")
+    query.add_argument('query')
+    query.add_argument('--from', dest='date_from', help="first date (YYYY, YYYY-MM, YYYY-MM-DD, ...)")
+    query.add_argument('--to', dest='date_to', help="last date, inclusive")
+    query.add_argument('--category', choices=CATEGORIES)
+    query.add_argument('-k', type=int, default=10, help="number of results")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        index = build_index(args.index)
+        print(f"Indexed {len(index)} headlines, {len(index.postings)} terms "
+              f"in {time.perf_counter() - start:.2f}s")
+        print(f"Saved to: {args.index}")
+        return
+
+    start = time.perf_counter()
+    index = HeadlineIndex.load(args.index)
+    loaded = time.perf_counter()
+    hits = index.search(args.query, args.date_from, args.date_to, args.category, args.k)
+    done = time.perf_counter()
+
+    for hit in hits:
+        print(f"  {hit['score']:6.2f}  {hit['date']}  [{hit['category']}] {hit['title'][:90]}")
+    print(f"\n{len(hits)} results (load {(loaded - start) * 1000:.0f} ms, query {(done - loaded) * 1000:.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,9 @@ import re
 import PyPDF2
 from datetime import datetime
 
+from bmc_dates import (TEXT_FULL_DATE_RE, TEXT_MONTH_YEAR_RE, TEXT_SEASON_RE,
+                       TEXT_YEAR_RANGE_RE, expand_short_year)
+
 PDF_PATH = "/Users/sylvain/Documents/DATA BMC/Duberman_Martin_Black_Mountain_College_An_Exploration_in_Community_1972-avec compression.pdf"
 OUTPUT_FILE = "../duberman_extracted.json"
 PROGRESS_FILE = "../duberman_parse_progress.json"
@@ -34,16 +37,13 @@ KNOWN_PEOPLE = [
     "Joel Oppenheimer", "Francine du Plessix", "Vera Williams"
 ]
 
-# Month patterns
-MONTHS = r'(?:January|February|March|April|May|June|July|August|September|October|November|December)'
-
 def extract_dates(text):
     """Extract dates from text"""
     dates = []
+    full_date_positions = set()
 
     # Full date: January 15, 1945
-    pattern1 = rf'({MONTHS})\s+(\d{{1,2}}),?\s+(19[3-5]\d)'
-    for match in re.finditer(pattern1, text):
+    for match in TEXT_FULL_DATE_RE.finditer(text):
         dates.append({
             'type': 'exact',
             'raw': match.group(0),
@@ -52,13 +52,12 @@ def extract_dates(text):
             'year': int(match.group(3)),
             'position': match.start()
         })
+        full_date_positions.add(match.start())
 
     # Month Year: January 1945
-    pattern2 = rf'({MONTHS})\s+(19[3-5]\d)'
-    for match in re.finditer(pattern2, text):
+    for match in TEXT_MONTH_YEAR_RE.finditer(text):
         # Check not already captured as full date
-        already_captured = any(d['position'] == match.start() for d in dates)
-        if not already_captured:
+        if match.start() not in full_date_positions:
             dates.append({
                 'type': 'month',
                 'raw': match.group(0),
@@ -68,22 +67,17 @@ def extract_dates(text):
             })
 
     # Year range in text: 1933-1934 or 1933-34
-    pattern3 = r'\b(19[3-5]\d)[-–](19[3-5]\d|\d{2})\b'
-    for match in re.finditer(pattern3, text):
-        end = match.group(2)
-        if len(end) == 2:
-            end = match.group(1)[:2] + end
+    for match in TEXT_YEAR_RANGE_RE.finditer(text):
         dates.append({
             'type': 'range',
             'raw': match.group(0),
             'start_year': int(match.group(1)),
-            'end_year': int(end),
+            'end_year': expand_short_year(match.group(1), match.group(2)),
             'position': match.start()
         })
 
     # Seasons: fall 1945, spring of 1946
-    pattern4 = r'(?:fall|spring|summer|winter)\s+(?:of\s+)?(19[3-5]\d)'
-    for match in re.finditer(pattern4, text, re.IGNORECASE):
+    for match in TEXT_SEASON_RE.finditer(text):
         dates.append({
             'type': 'season',
             'raw': match.group(0),
@@ -5,9 +5,10 @@ Each document becomes an event (date of creation/edition).
 """
 
 import json
-import re
 from datetime import datetime
 
+from bmc_dates import normalize
+
 INPUT_FILE = "../dreier_collection_raw.json"
 OUTPUT_FILE = "../dreier_events.json"
 PEOPLE_INDEX = "../bmc_people_index.json"
@@ -19,22 +20,13 @@ def parse_date_string(date_str):
         return None
 
     date_str = date_str.strip()
+    record = normalize(date_str)
+    precision = record.precision if record else None
+    year = int(record.start_day[:4]) if record else None
 
-    # Year range: 1933-1934
-    match = re.match(r'^(\d{4})-(\d{4})$', date_str)
-    if match:
-        return {
-            'type': 'academic_year',
-            'start_year': int(match.group(1)),
-            'end_year': int(match.group(2)),
-            'display': date_str
-        }
-
-    # Year range short: 1933-34
-    match = re.match(r'^(\d{4})-(\d{2})$', date_str)
-    if match:
-        start = int(match.group(1))
-        end = int(match.group(1)[:2] + match.group(2))
+    # Year range: 1933-1934 or 1933-34
+    if precision == 'academic_year':
+        start, end = year, int(record.end_day[:4])
         return {
             'type': 'academic_year',
             'start_year': start,
@@ -42,47 +34,51 @@ def parse_date_string(date_str):
             'display': f"{start}-{end}"
         }
 
+    # Span: September 9, 1939 to August 31, 1940 (keeps both ends)
+    if (precision == 'day' and record.end_day != record.start_day
+            or precision == 'month' and record.end_day[:7] != record.start_day[:7]):
+        return {
+            'type': 'range',
+            'start_year': year,
+            'end_year': int(record.end_day[:4]),
+            'start_date': record.start_day,
+            'end_date': record.end_day,
+            'display': date_str
+        }
+
     # Single year: 1945
-    match = re.match(r'^(\d{4})$', date_str)
-    if match:
+    if precision == 'year':
         return {
             'type': 'year',
-            'year': int(match.group(1)),
+            'year': year,
             'display': date_str
         }
 
     # Month Year: September 1945
-    match = re.match(r'^(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{4})$', date_str)
-    if match:
-        months = {'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
-                  'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12}
+    if precision == 'month':
         return {
             'type': 'month',
-            'year': int(match.group(2)),
-            'month': months[match.group(1)],
+            'year': year,
+            'month': int(record.start_day[5:7]),
             'display': date_str
         }
 
     # Full date: September 25, 1933
-    match = re.match(r'^(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})$', date_str)
-    if match:
-        months = {'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
-                  'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12}
+    if precision == 'day':
         return {
             'type': 'exact',
-            'year': int(match.group(3)),
-            'month': months[match.group(1)],
-            'day': int(match.group(2)),
+            'year': year,
+            'month': int(record.start_day[5:7]),
+            'day': int(record.start_day[8:10]),
             'display': date_str
         }
 
     # Circa/approximate
-    match = re.match(r'^c\.?\s*(\d{4})$', date_str, re.IGNORECASE)
-    if match:
+    if precision == 'circa':
         return {
             'type': 'circa',
-            'year': int(match.group(1)),
-            'display': f"c. {match.group(1)}"
+            'year': year,
+            'display': f"c. {year}"
         }
 
     return {'type': 'unknown', 'raw': date_str, 'display': date_str}
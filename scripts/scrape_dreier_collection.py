@@ -13,6 +13,8 @@ import urllib.parse
 import ssl
 from datetime import datetime
 
+from bmc_dates import TEXT_FULL_DATE_ANY_YEAR_RE, TEXT_YEAR_RANGE_RE, TEXT_YEAR_RE, expand_short_year
+
 # SSL context (bypass verification for this research project)
 SSL_CONTEXT = ssl.create_default_context()
 SSL_CONTEXT.check_hostname = False
@@ -146,7 +148,7 @@ def extract_dates(text):
     dates = []
 
     # Full dates: Month Day, Year
-    for match in re.finditer(r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})', text):
+    for match in TEXT_FULL_DATE_ANY_YEAR_RE.finditer(text):
         dates.append({
             'type': 'exact',
             'raw': match.group(0),
@@ -156,15 +158,12 @@ def extract_dates(text):
         })
 
     # Year ranges: 1933-1934
-    for match in re.finditer(r'\b(19[3-5]\d)[-–](19[3-5]\d|\d{2})\b', text):
-        end_year = match.group(2)
-        if len(end_year) == 2:
-            end_year = match.group(1)[:2] + end_year
+    for match in TEXT_YEAR_RANGE_RE.finditer(text):
         dates.append({
             'type': 'range',
             'raw': match.group(0),
             'start_year': int(match.group(1)),
-            'end_year': int(end_year)
+            'end_year': expand_short_year(match.group(1), match.group(2))
         })
 
     # Single years
@@ -176,7 +175,7 @@ def extract_dates(text):
             seen_years.add(d['start_year'])
             seen_years.add(d['end_year'])
 
-    for match in re.finditer(r'\b(19[3-5]\d)\b', text):
+    for match in TEXT_YEAR_RE.finditer(text):
         year = int(match.group(1))
         if year not in seen_years:
             dates.append({